@@ -10,19 +10,45 @@ import pywhatkit as kit
 import sys
 import openai
 import random
-import subprocess
-import psutil
-import signal
 from config import apikey # Import API key from config file
+from WakeWord import WakeWordGate
+from PhraseCache import PhraseCache
+from SessionStore import SessionStore
+import Profiler
+from Supervisor import Supervisor
 
 # Initialize text-to-speech engine
 engine = pyttsx3.init('sapi5')
 voices = engine.getProperty('voices')
 engine.setProperty('voices', voices[0].id)
 
+# Fixed prompts are rendered once and played back from the phrase cache
+phrase_cache = PhraseCache(engine)
+FIXED_PHRASES = [
+    "Good Morning", "Good Afternoon", "Good Evening",
+    "I am your Fitness Trainer. Please tell me how can I help you.",
+    "Get ready to do Bicep curls, Move 3 step Backwards", "Closing Bicep curls exercise.",
+    "Get ready to do Jumping Jack. Move 3 step Backwards", "Closing Jumping Jack exercise.",
+    "Get ready to do squats. Move 3 step Backwards", "Closing squats exercise.",
+    "Start any exercise, I will recognize it. Move 3 step Backwards", "Closing exercise.",
+    "Gym exercise is already open.", "Gym exercise is not open.",
+    "I'm not knowledgeable about that.", "Okay sir, closing Notepad", "Sir, what should I search?",
+    "Thank you for using me. Have a great day!", "Thank you. Goodbye!",
+]
+
 # Store chat history for OpenAI interaction
 chat_history = ""
 
+# Record assistant interactions in the session store
+session_store = SessionStore()
+assistant_session = session_store.session("assistant")
+
+# Exercise workers run pose inference on their own CPUs, restarted if they crash or get stuck
+supervisor = Supervisor(session=assistant_session)
+
+# Only commands starting with "fitness" are sent to the speech recognizer
+wake_word_gate = WakeWordGate(wake_word="fitness")
+
 #/// The following section is from :-
 #///OpenAI platform, 2023. OpenAI platform [online]. Openai.com.
 #///Available from: https://platform.openai.com/playground [Accessed 14 Aug 2023].
@@ -47,6 +73,7 @@ def chat_with_openai(query):
     )
     # Speak the AI response and update chat history
     speak(response["choices"][0]["text"])
+    assistant_session.record_interaction("chat", query, response["choices"][0]["text"])
     chat_history += f"{response['choices'][0]['text']}\n"
     return response["choices"][0]["text"]
 #/// end of Citation
@@ -54,7 +81,6 @@ def chat_with_openai(query):
 # Function to generate AI response for a specific prompt
 def generate_ai_response(prompt):
     openai.api_key = apikey
-    text = f"OpenAI response for Prompt: {prompt}\n*************************\n\n"
 
     # Generate AI response using OpenAI's API
     response = openai.Completion.create(
@@ -67,17 +93,8 @@ def generate_ai_response(prompt):
         presence_penalty=0
     )
 
-    text += response["choices"][0]["text"]
-
-    # Create a directory for OpenAI responses if it doesn't exist
-    if not os.path.exists("Openai"):
-        os.mkdir("Openai")
-
-    # Save AI response to a file
-    response_filename = f"Openai/{''.join(prompt.split()).strip()}.txt"
-
-    with open(response_filename, "w") as f:
-        f.write(text)
+    # Save AI response in the session store
+    assistant_session.record_interaction("prompt", prompt, response["choices"][0]["text"])
 
 # Check if a fitness-related keyword is present in the query
 def is_fitness_keyword_present(query):
@@ -100,7 +117,6 @@ def is_fitness_keyword_present(query):
 # Function to execute the main tasks
 def main_task_execution():
     wish_user()
-    gym_process_pid = None
 
     while True:
         user_query = take_user_command().lower().replace("one", "1")
@@ -143,35 +159,45 @@ def main_task_execution():
             play_youtube_song()
 
 
+        # Execute computer vision that recognizes the exercise being performed
+        elif "exercise" in user_query and "auto" in user_query:
+
+            start_auto_exercise()
+
+
+        elif "close" in user_query and "auto" in user_query:
+
+            close_auto_exercise()
+
         # Execute computer vision for bicep curls task
         elif "exercise" in user_query and ("one" in user_query or "1" in user_query):
 
-            start_bicep_curls(gym_process_pid)
+            start_bicep_curls()
 
 
         elif "close" in user_query and ("one" in user_query or "1" in user_query):
 
-            close_bicep_curls(gym_process_pid)
+            close_bicep_curls()
 
         # Execute computer vision for Jumping Jack task
         elif "exercise" in user_query and ("two" in user_query or "2" in user_query):
 
-            start_jumping_jack(gym_process_pid)
+            start_jumping_jack()
 
 
         elif "close" in user_query and ("two" in user_query or "2" in user_query):
 
-            close_jumping_jack(gym_process_pid)
+            close_jumping_jack()
 
         # Execute computer vision for squats task
         elif "exercise" in user_query and ("three" in user_query or "3" in user_query):
 
-            start_squats(gym_process_pid)
+            start_squats()
 
 
         elif "close" in user_query and ("three" in user_query or "3" in user_query):
 
-            close_squats(gym_process_pid)
+            close_squats()
 
         # Generate AI response for custom prompts
         elif "make" in user_query.lower():
@@ -189,7 +215,7 @@ def main_task_execution():
 
 
 # Function to take user's voice command
-def take_user_command():
+def take_user_command(require_wake_word=True):
     r = sr.Recognizer()
     with sr.Microphone() as source:
         print("Listening...")
@@ -199,7 +225,12 @@ def take_user_command():
 
     try:
         print("Recognizing...")
-        query = r.recognize_google(audio, language='en-in')
+        if require_wake_word:
+            query = wake_word_gate.recognize(r, audio)
+            if query is None:
+                return "none"
+        else:
+            query = r.recognize_google(audio, language='en-in')
         print(f"User said: {query}")
 
     except Exception as e:
@@ -212,8 +243,10 @@ def take_user_command():
 
 # Function to speak text
 def speak(audio):
-    engine.say(audio)
     print(audio)
+    if phrase_cache.play(audio):
+        return
+    engine.say(audio)
     engine.runAndWait()
 
 
@@ -275,7 +308,7 @@ def open_website(url):
 
 def search_google():
     speak("Sir, what should I search?")
-    query = take_user_command().lower()
+    query = take_user_command(require_wake_word=False).lower()
     webbrowser.open(f"https://www.google.com/search?q={query}")
 
 
@@ -283,74 +316,57 @@ def play_youtube_song():
     kit.playonyt("love story")
 
 
-gym_process_pid = None
-
-def start_bicep_curls(process_pid):
-    global gym_process_pid
-
-    if gym_process_pid is None or not psutil.pid_exists(gym_process_pid):
-        gym_path = "D:\\Motion_detect\\AItrainer6.py"
-        gym_process = subprocess.Popen(["python", gym_path])
-        gym_process_pid = gym_process.pid
-        speak("Get ready to do Bicep curls, Move 3 step Backwards")
-    else:
+# Only one exercise runs at a time, since the workers share the camera
+def start_gym_exercise(name, gym_path, message):
+    if supervisor.running():
         speak("Gym exercise is already open.")
+    else:
+        supervisor.launch(name, ["python", gym_path])
+        speak(message)
 
-def close_bicep_curls(process_pid):
-    global gym_process_pid
-
-    if gym_process_pid and psutil.pid_exists(gym_process_pid):
-        os.kill(gym_process_pid, signal.SIGTERM)
-        gym_process_pid = None
-        speak("Closing Bicep curls exercise.")
+def close_gym_exercise(message):
+    if supervisor.stop():
+        speak(message)
     else:
         speak("Gym exercise is not open.")
 
-def start_jumping_jack(process_pid):
-    global gym_process_pid
+def start_bicep_curls():
+    start_gym_exercise("bicep_curls", "D:\\Motion_detect\\AItrainer6.py",
+                       "Get ready to do Bicep curls, Move 3 step Backwards")
 
-    if gym_process_pid is None or not psutil.pid_exists(gym_process_pid):
-        gym_path = "D:\\Motion_detect\\Aitrainer8.py"
-        gym_process = subprocess.Popen(["python", gym_path])
-        gym_process_pid = gym_process.pid
-        speak("Get ready to do Jumping Jack. Move 3 step Backwards")
-    else:
-        speak("Gym exercise is already open.")
+def close_bicep_curls():
+    close_gym_exercise("Closing Bicep curls exercise.")
 
-def close_jumping_jack(process_pid):
-    global gym_process_pid
+def start_jumping_jack():
+    start_gym_exercise("jumping_jacks", "D:\\Motion_detect\\Aitrainer8.py",
+                       "Get ready to do Jumping Jack. Move 3 step Backwards")
 
-    if gym_process_pid and psutil.pid_exists(gym_process_pid):
-        os.kill(gym_process_pid, signal.SIGTERM)
-        gym_process_pid = None
-        speak("Closing Jumping Jack exercise.")
-    else:
-        speak("Gym exercise is not open.")
+def close_jumping_jack():
+    close_gym_exercise("Closing Jumping Jack exercise.")
 
-def start_squats(process_pid):
-    global gym_process_pid
+def start_squats():
+    start_gym_exercise("squats", "D:\\Motion_detect\\Aitrainer9.py",
+                       "Get ready to do squats. Move 3 step Backwards")
 
-    if gym_process_pid is None or not psutil.pid_exists(gym_process_pid):
-        gym_path = "D:\\Motion_detect\\Aitrainer9.py"
-        gym_process = subprocess.Popen(["python", gym_path])
-        gym_process_pid = gym_process.pid
-        speak("Get ready to do squats. Move 3 step Backwards")
-    else:
-        speak("Gym exercise is already open.")
+def close_squats():
+    close_gym_exercise("Closing squats exercise.")
 
-def close_squats(process_pid):
-    global gym_process_pid
+def start_auto_exercise():
+    start_gym_exercise("exercise_recognition", "D:\\Motion_detect\\ExerciseRecognition.py",
+                       "Start any exercise, I will recognize it. Move 3 step Backwards")
+
+def close_auto_exercise():
+    close_gym_exercise("Closing exercise.")
 
-    if gym_process_pid and psutil.pid_exists(gym_process_pid):
-        os.kill(gym_process_pid, signal.SIGTERM)
-        gym_process_pid = None
-        speak("Closing squats exercise.")
-    else:
-        speak("Gym exercise is not open.")
 
 
 # The following part of the code initializes variables and starts the main loop based on user commands
 if __name__ == "__main__":
+    # Send SIGUSR1 (Ctrl+Break on Windows) to capture a profile of the running assistant
+    Profiler.install()
+    # Keep speech recognition on CPUs the exercise workers do not use
+    supervisor.pin_assistant()
+    phrase_cache.render(FIXED_PHRASES)
     while True:
         user_command = take_user_command()
         # Check if the user wants to initiate the main task execution
@@ -363,4 +379,5 @@ if __name__ == "__main__":
             main_task_execution()
         elif "bye" in user_command:
             speak("Thank you. Goodbye!")
+            supervisor.stop()
             sys.exit()
\ No newline at end of file
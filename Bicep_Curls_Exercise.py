@@ -6,6 +6,18 @@ import cv2
 import numpy as np
 import time
 import PoseModule5 as pm
+import Station
+import Profiler
+from WarmStart import warm_start
+from FormScoring import load_form_scorer
+from SessionStore import SessionStore
+
+FORM_REFERENCE_FILE = "form_references/bicep_curls.npz"
+FORM_JOINTS = {
+    "right_elbow": (12, 14, 16),
+    "left_elbow": (11, 13, 15),
+    "right_shoulder": (24, 12, 14),
+}
 
 
 class PoseEstimator:
@@ -14,12 +26,30 @@ class PoseEstimator:
     and repetitions performed during a workout.
     """
 
-    def __init__(self):
-        """Initializes the pose detector and other necessary attributes."""
-        self.pose_detector = pm.BodyPoseAnalyzer()
+    # Arm angles mapped to 0 % and 100 % of the progress bar
+    ANGLE_RANGE = (50, 160)
+
+    def __init__(self, form_scorer=None, pose_detector=None, session=None, reference_file=None):
+        """
+        Initializes the pose detector and other necessary attributes.
+
+        Args:
+        - form_scorer (RepFormScorer): Optional scorer comparing each completed rep against reference reps.
+        - pose_detector (BodyPoseAnalyzer): Optional detector shared with other estimators.
+        - session (Session): Optional session recording the frames and reps.
+        - reference_file (str): When given, every completed rep is added to the reference reps of the
+          form scorer and saved to this file.
+        """
+        self.pose_detector = pose_detector or pm.BodyPoseAnalyzer()
+        self.session = session
+        self.form_scorer = form_scorer
+        self.reference_file = reference_file
+        self.last_form_score = None
+        self.last_angle = None
         self.previous_time = 0
         self.direction = 0
         self.repetitions = 0
+        self.rep_started = False  # Whether the frames fed to the form scorer belong to a rep
 
     def get_right_arm_angle(self, image):
         """
@@ -49,10 +79,78 @@ class PoseEstimator:
 
         if landmarks:
             angle = self.get_right_arm_angle(image)
+            self.last_angle = angle
+            repetitions, direction = self.repetitions, self.direction
             self.draw_workout_info(image, angle)
+            if self.form_scorer:
+                self.track_rep_form(image, landmarks, angle, direction)
+            if int(self.repetitions) > int(repetitions):
+                self.complete_rep()
+            if self.session:
+                self.session.record_frame(angle, self.repetitions)
 
         return image
 
+    def track_rep_form(self, image, landmarks, angle, direction):
+        """
+        Feeds the current frame to the form scorer when it belongs to a rep.
+
+        A rep starts on the last frame in the start zone (0 % of the progress bar, the curled arm),
+        so the pauses between reps are left out but the whole movement is scored. The start of a first
+        rep begun outside the start zone cannot be told from the lead-in, so it is scored from its first
+        direction change.
+
+        Args:
+        - image (np.ndarray): The image/frame being processed.
+        - landmarks (list): List of landmark positions.
+        - angle (float): Angle measured on this frame.
+        - direction (int): Movement direction before this frame.
+        """
+        if direction == 0 and self.direction == 0:
+            if np.interp(angle, self.ANGLE_RANGE, (0, 100)) == 0:
+                self.form_scorer.reset()
+                self.rep_started = True
+            elif not self.rep_started:
+                return
+        elif not self.rep_started:
+            self.form_scorer.reset()
+            self.rep_started = True
+        self.form_scorer.update(self.form_scorer.measure(self.pose_detector, image, landmarks))
+
+    def reset_movement(self):
+        """
+        Forgets the movement in progress, such as a rep left halfway when the athlete switched to
+        another exercise. Completed reps are kept.
+        """
+        self.direction = 0
+        self.repetitions = int(self.repetitions)
+        self.rep_started = False
+        if self.form_scorer:
+            self.form_scorer.reset()
+
+    def workout_data(self):
+        """
+        Returns the workout data shown to remote viewers.
+
+        Returns:
+        - dict: Exercise name, repetitions and angle of the latest frame.
+        """
+        return {"exercise": "bicep_curls", "repetitions": int(self.repetitions), "angle": self.last_angle}
+
+    def complete_rep(self):
+        """
+        Scores the rep that has just been completed and records it in the session. When recording
+        references, the rep is also saved as a reference rep.
+        """
+        if self.form_scorer:
+            self.last_form_score = self.form_scorer.finish_rep()
+            if self.reference_file and len(self.form_scorer.last_trajectory):
+                self.form_scorer.add_reference(self.form_scorer.last_trajectory)
+                self.form_scorer.save_references(self.reference_file)
+        if self.session:
+            score = self.last_form_score.score if self.last_form_score else None
+            self.session.record_rep(self.repetitions, score)
+
     def draw_workout_info(self, image, angle):
         """
         Draws the workout details (like repetitions and angle percentage) on the image.
@@ -61,8 +159,8 @@ class PoseEstimator:
         - image (np.ndarray): The image on which to draw the details.
         - angle (float): The angle of the right arm.
         """
-        percentage = np.interp(angle, (50, 160), (0, 100))
-        bar_position = np.interp(angle, (50, 160), (650, 100))
+        percentage = np.interp(angle, self.ANGLE_RANGE, (0, 100))
+        bar_position = np.interp(angle, self.ANGLE_RANGE, (650, 100))
         bar_color = self.get_bar_color(percentage)
 
         cv2.rectangle(image, (1100, 100), (1175, 650), bar_color, -1)
@@ -70,6 +168,9 @@ class PoseEstimator:
         cv2.putText(image, f'{int(percentage)} %', (1080, 75), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 4)
         cv2.putText(image, f'Reps: {int(self.repetitions)}', (50, 700), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 5,
                     cv2.LINE_AA)
+        if self.last_form_score:
+            cv2.putText(image, f'Form: {int(self.last_form_score.score)} % ({self.last_form_score.worst_joint})',
+                        (50, 630), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3, cv2.LINE_AA)
 
     def get_bar_color(self, percentage):
         """
@@ -108,23 +209,37 @@ class PoseEstimator:
 
 def main():
     """Main function to capture video feed, process it, and display the processed frames."""
-    cap = cv2.VideoCapture(0)
-    estimator = PoseEstimator()
-
-    while True:
-        success, frame = cap.read()
-        if not success:
-            break
-        frame = cv2.resize(frame, (1280, 720))
-        processed_image = estimator.process_image(frame)
-        estimator.calculate_fps(processed_image)
-
-        cv2.imshow("Workout Tracking", processed_image)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-    cap.release()
-    cv2.destroyAllWindows()
+    args = Station.parse_arguments("Bicep curls station", form_scoring=True)
+
+    def setup():
+        return (SessionStore(), load_form_scorer(FORM_REFERENCE_FILE, FORM_JOINTS), Station.open_stream(args),
+                Station.open_recorder(args))
+
+    cap, pose_detector, resources = warm_start(setup, model_complexity=args.model_complexity,
+                                               recalibrate=args.recalibrate)
+    store, form_scorer, stream, recorder = resources
+    estimator = PoseEstimator(form_scorer, pose_detector, store.session("bicep_curls"),
+                              FORM_REFERENCE_FILE if args.record_reference else None)
+
+    Station.exit_on_stop_signals()
+    Profiler.install(args.profile_port, break_signal=False)
+
+    try:
+        while True:
+            success, frame = cap.read()
+            if not success:
+                break
+            frame = cv2.resize(frame, (1280, 720))
+            processed_image = estimator.process_image(frame)
+            estimator.calculate_fps(processed_image)
+            if stream:
+                stream.publish(processed_image, estimator.workout_data())
+            if not Station.present(processed_image, pose_detector, args, recorder):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        Station.close(cap, args, recorder)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,233 @@
+import cv2
+import numpy as np
+import time
+import Station
+import Profiler
+import Bicep_Curls_Exercise
+import Jumping_Jacks_Exercise
+import Squats_Exercise
+from FormScoring import load_form_scorer
+from SessionStore import SessionStore
+from WarmStart import warm_start
+
+EXERCISE_NAMES = {
+    "bicep_curls": "Bicep Curls",
+    "squats": "Squats",
+    "jumping_jacks": "Jumping Jacks",
+}
+
+# Right elbow, left elbow, right knee and left knee, as (first, middle, last) landmark triplets
+ANGLE_TRIPLETS = np.array([(12, 14, 16), (11, 13, 15), (24, 26, 28), (23, 25, 27)])
+
+# Movement range of each window feature for every class:
+# [elbow angle, knee angle, ankle spread, wrist height, hip height]
+DEFAULT_CENTROIDS = {
+    "idle": (0.05, 0.05, 0.02, 0.05, 0.02),
+    "bicep_curls": (1.1, 0.1, 0.05, 0.6, 0.05),
+    "squats": (0.3, 1.0, 0.05, 0.3, 0.7),
+    "jumping_jacks": (0.3, 0.2, 0.9, 1.8, 0.2),
+}
+
+
+class ExerciseRecognizer:
+    """
+    Recognizes the exercise being performed from rolling windows of landmark features.
+
+    Every frame is reduced to a handful of body-size independent features (joint angles,
+    ankle spread, wrist and hip height) stored in a fixed-size ring buffer. Every `stride`
+    frames the movement range of each feature over the window is compared against the
+    class centroids, and the active exercise only switches after the same class has been
+    recognized `confirmations` times in a row.
+
+    The first exercise is recognized after `window + (confirmations - 1) * stride` frames (55 by
+    default, about 2 s at 30 FPS), and a switch takes about as long. The reps performed during
+    this lead-in are not counted.
+    """
+
+    def __init__(self, window=45, stride=5, confirmations=3, centroids=None):
+        """
+        Initializes the recognizer.
+
+        Args:
+        - window (int): Number of frames in the rolling window.
+        - stride (int): Number of frames between two classifications.
+        - confirmations (int): Consecutive identical classifications required to switch exercise.
+        - centroids (dict): Class name -> window feature centroid. The "idle" class means no exercise.
+        """
+        centroids = centroids or DEFAULT_CENTROIDS
+        self.window = window
+        self.stride = stride
+        self.confirmations = confirmations
+        self.labels = list(centroids)
+        self.centroids = np.array([centroids[label] for label in self.labels], dtype=np.float32)
+        self.buffer = np.zeros((window, 7), dtype=np.float32)
+        self.frame_count = 0
+        self.candidate = None
+        self.candidate_count = 0
+        self.exercise = None
+
+    def frame_features(self, landmarks):
+        """
+        Extracts the per-frame features from the landmark positions.
+
+        Args:
+        - landmarks (list): List of landmark positions.
+
+        Returns:
+        - np.ndarray: Elbow and knee angles in degrees followed by ankle spread, wrist height and
+          hip height, in torso lengths.
+        """
+        points = np.asarray(landmarks, dtype=np.float32)[:, 1:3]
+
+        first = points[ANGLE_TRIPLETS[:, 0]] - points[ANGLE_TRIPLETS[:, 1]]
+        last = points[ANGLE_TRIPLETS[:, 2]] - points[ANGLE_TRIPLETS[:, 1]]
+        cosine = (first * last).sum(axis=1) / (np.linalg.norm(first, axis=1) * np.linalg.norm(last, axis=1) + 1e-6)
+        angles = np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+        shoulders = (points[11] + points[12]) / 2
+        hips = (points[23] + points[24]) / 2
+        ankles = (points[27] + points[28]) / 2
+        torso = np.linalg.norm(shoulders - hips) + 1e-6
+
+        ankle_spread = abs(points[27][0] - points[28][0]) / torso
+        wrist_height = (shoulders[1] - (points[15][1] + points[16][1]) / 2) / torso
+        hip_height = (ankles[1] - hips[1]) / torso
+        return np.concatenate((angles, (ankle_spread, wrist_height, hip_height)))
+
+    def window_features(self):
+        """
+        Computes the movement range of each feature over the rolling window.
+
+        Returns:
+        - np.ndarray: Elbow and knee angle ranges (in units of 90 degrees), ankle spread, wrist height and
+          hip height ranges.
+        """
+        low, high = np.percentile(self.buffer, (10, 90), axis=0)
+        movement = high - low
+        return np.array((movement[0:2].mean() / 90, movement[2:4].mean() / 90,
+                         movement[4], movement[5], movement[6]), dtype=np.float32)
+
+    def classify(self, features):
+        """
+        Assigns window features to the nearest class centroid.
+
+        Args:
+        - features (np.ndarray): Window features.
+
+        Returns:
+        - str: The exercise name, or None when the athlete is idle.
+        """
+        label = self.labels[int(np.argmin(np.linalg.norm(self.centroids - features, axis=1)))]
+        return None if label == "idle" else label
+
+    def fit(self, windows, labels):
+        """
+        Replaces the class centroids with the mean window features of labelled recordings.
+
+        Args:
+        - windows (array-like): Window features with shape (samples, 5).
+        - labels (list): Class name of every sample. Use "idle" for no exercise.
+        """
+        windows = np.asarray(windows, dtype=np.float32)
+        labels = np.asarray(labels)
+        self.labels = sorted(set(labels.tolist()))
+        self.centroids = np.array([windows[labels == label].mean(axis=0) for label in self.labels])
+
+    def update(self, landmarks):
+        """
+        Adds a frame to the rolling window and updates the recognized exercise.
+
+        Args:
+        - landmarks (list): List of landmark positions.
+
+        Returns:
+        - str: The recognized exercise, or None if none has been recognized yet.
+        """
+        self.buffer[self.frame_count % self.window] = self.frame_features(landmarks)
+        self.frame_count += 1
+        if self.frame_count < self.window or self.frame_count % self.stride:
+            return self.exercise
+
+        label = self.classify(self.window_features())
+        if label == self.candidate:
+            self.candidate_count += 1
+        else:
+            self.candidate = label
+            self.candidate_count = 1
+
+        if label is not None and self.candidate_count >= self.confirmations:
+            self.exercise = label
+        return self.exercise
+
+
+def main():
+    """Main function to capture video feed and count reps of whichever exercise is being performed."""
+    args = Station.parse_arguments("Station recognizing the exercise being performed", form_scoring=True)
+
+    def setup():
+        return (SessionStore(),
+                load_form_scorer(Bicep_Curls_Exercise.FORM_REFERENCE_FILE, Bicep_Curls_Exercise.FORM_JOINTS),
+                load_form_scorer(Squats_Exercise.FORM_REFERENCE_FILE, Squats_Exercise.FORM_JOINTS),
+                Station.open_stream(args), Station.open_recorder(args))
+
+    cap, pose_detector, resources = warm_start(setup, model_complexity=args.model_complexity,
+                                               recalibrate=args.recalibrate)
+    store, curls_scorer, squats_scorer, stream, recorder = resources
+    estimators = {
+        "bicep_curls": Bicep_Curls_Exercise.PoseEstimator(
+            curls_scorer, pose_detector, store.session("bicep_curls"),
+            Bicep_Curls_Exercise.FORM_REFERENCE_FILE if args.record_reference else None),
+        "squats": Squats_Exercise.PoseEstimator(
+            squats_scorer, pose_detector, store.session("squats"),
+            Squats_Exercise.FORM_REFERENCE_FILE if args.record_reference else None),
+        "jumping_jacks": Jumping_Jacks_Exercise.PoseEstimator(pose_detector, store.session("jumping_jacks")),
+    }
+    recognizer = ExerciseRecognizer()
+    previous_time = 0
+
+    Station.exit_on_stop_signals()
+    Profiler.install(args.profile_port, break_signal=False)
+
+    try:
+        while True:
+            success, frame = cap.read()
+            if not success:
+                break
+            frame = cv2.resize(frame, (1280, 720))
+
+            # Pose inference runs once per frame, inside the active estimator when there is one
+            if recognizer.exercise:
+                frame = estimators[recognizer.exercise].process_image(frame)
+            else:
+                frame = pose_detector.get_pose(frame, False)
+
+            landmarks = pose_detector.get_landmark_positions(frame, False)
+            if landmarks:
+                exercise = recognizer.exercise
+                # The estimator taking over may have been left mid-rep, and its stale direction would
+                # count a half rep from the first frame
+                if recognizer.update(landmarks) != exercise:
+                    estimators[recognizer.exercise].reset_movement()
+
+            name = EXERCISE_NAMES.get(recognizer.exercise, "Detecting exercise...")
+            cv2.putText(frame, name, (400, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 4, cv2.LINE_AA)
+
+            current_time = time.time()
+            fps = 1 / (current_time - previous_time)
+            previous_time = current_time
+            cv2.putText(frame, f'FPS: {int(fps)}', (50, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 255), 4,
+                        cv2.LINE_AA)
+            if stream:
+                data = estimators[recognizer.exercise].workout_data() if recognizer.exercise else {"exercise": None}
+                stream.publish(frame, data)
+
+            if not Station.present(frame, pose_detector, args, recorder):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        Station.close(cap, args, recorder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import os
+import numpy as np
+
+
+class FormScore:
+    """
+    Result of comparing one completed repetition against the stored reference reps.
+    """
+
+    def __init__(self, score, deviation, worst_joint, worst_joint_deviation, reference_index):
+        """
+        Args:
+        - score (float): Similarity score from 0 (poor) to 100 (matches the reference).
+        - deviation (float): Mean angle deviation in degrees along the warping path.
+        - worst_joint (str): Name of the joint that deviated the most.
+        - worst_joint_deviation (float): Mean angle deviation of that joint in degrees.
+        - reference_index (int): Index of the reference rep that matched best.
+        """
+        self.score = score
+        self.deviation = deviation
+        self.worst_joint = worst_joint
+        self.worst_joint_deviation = worst_joint_deviation
+        self.reference_index = reference_index
+
+
+class RepFormScorer:
+    """
+    Scores the multi-joint angle trajectory of each rep against reference reps using an
+    incremental, banded dynamic time warping (DTW).
+
+    Every frame adds one row to the DTW cost matrix of each reference. The row is only
+    evaluated inside a band around the expected diagonal, which assumes the rep runs at the
+    tempo of the previous rep (or of the reference for the first one), and each frame may
+    advance the reference by 0, 1 or 2 steps, so a row has no dependency on itself and is
+    computed in a single vectorized pass. The work per frame is bounded by (number of
+    references x band x number of joints), whatever the length of the rep.
+
+    The alignment has an open end: when the rep ends before the band reaches the end of a
+    reference, the remaining reference frames are matched against the last frame of the rep,
+    so a partial-range rep gets a lower score rather than no score.
+    """
+
+    def __init__(self, joints, references=(), band=12, tolerance=45.0):
+        """
+        Initializes the scorer.
+
+        Args:
+        - joints (dict): Joint name -> landmark triplet as used by `calculate_angle`, e.g. {"right_elbow": (12, 14, 16)}.
+        - references (iterable): Reference reps, each an array of shape (frames, joints) holding angles in degrees.
+        - band (int): Half width of the DTW band, in reference frames.
+        - tolerance (float): Mean deviation in degrees at which the score drops to 0.
+        """
+        self.joints = dict(joints)
+        self.joint_names = list(self.joints)
+        self.band = band
+        self.tolerance = tolerance
+        self.references = []
+        self.last_trajectory = None
+        self.rep_length = None
+        for reference in references:
+            self.add_reference(reference)
+        self.reset()
+
+    @classmethod
+    def from_file(cls, path, band=12, tolerance=45.0):
+        """
+        Loads a scorer and its reference reps from a file written by `save_references`.
+
+        Args:
+        - path (str): Path to the .npz file.
+        - band (int): Half width of the DTW band, in reference frames.
+        - tolerance (float): Mean deviation in degrees at which the score drops to 0.
+
+        Returns:
+        - RepFormScorer: The loaded scorer.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            joints = {str(name): tuple(int(p) for p in triplet)
+                      for name, triplet in zip(data["joint_names"], data["triplets"])}
+            count = int(data["count"])
+            references = [data[f"reference_{i}"] for i in range(count)]
+        return cls(joints, references, band=band, tolerance=tolerance)
+
+    def save_references(self, path):
+        """
+        Saves the joint definitions and reference reps to a .npz file.
+
+        Args:
+        - path (str): Destination path.
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        arrays = {f"reference_{i}": reference for i, reference in enumerate(self.references)}
+        np.savez(path, joint_names=np.array(self.joint_names),
+                 triplets=np.array([self.joints[name] for name in self.joint_names], dtype=np.int32),
+                 count=np.array(len(self.references)), **arrays)
+
+    def add_reference(self, trajectory):
+        """
+        Adds a reference rep. The rep in progress is discarded.
+
+        Args:
+        - trajectory (array-like): Angles in degrees with shape (frames, joints).
+        """
+        reference = np.asarray(trajectory, dtype=np.float32)
+        if reference.ndim != 2 or reference.shape[1] != len(self.joint_names) or len(reference) == 0:
+            raise ValueError(f"Reference rep must have shape (frames, {len(self.joint_names)})")
+        self.references.append(reference)
+        self.reset()
+
+    def reset(self):
+        """Starts a new rep, discarding any partially aligned frames."""
+        self.frame_count = 0
+        self.trajectory = []
+        self._costs = []
+        self._paths = []
+        self._windows = []
+        for reference in self.references:
+            length = len(reference)
+            costs = np.full(length, np.inf)
+            costs[0] = 0.0
+            self._costs.append(costs)
+            self._paths.append(np.zeros((length, len(self.joint_names))))
+            self._windows.append((0, 1))
+
+    def measure(self, pose_detector, image, landmarks):
+        """
+        Computes the angle of every scored joint from the current landmarks.
+
+        Args:
+        - pose_detector (BodyPoseAnalyzer): Detector providing `calculate_angle`.
+        - image (np.ndarray): The image/frame the landmarks belong to.
+        - landmarks (list): List of landmark positions.
+
+        Returns:
+        - np.ndarray: One angle per joint, in degrees.
+        """
+        return np.array([pose_detector.calculate_angle(image, *self.joints[name], landmarks, draw=False)
+                         for name in self.joint_names])
+
+    def update(self, angles):
+        """
+        Aligns one frame of the rep in progress against every reference.
+
+        Args:
+        - angles (array-like): One angle per joint, in degrees.
+        """
+        angles = np.asarray(angles, dtype=np.float32)
+        self.trajectory.append(angles)
+        self.frame_count += 1
+
+        row = self.frame_count - 1
+        for i, reference in enumerate(self.references):
+            length = len(reference)
+            previous = self._costs[i]
+            # A slope above 2 would outrun the cells reachable with steps of 0, 1 or 2
+            expected_length = min(max(self.rep_length or length, length / 2), 2 * length)
+            center = min(length - 1, int(round(row * length / expected_length)))
+            lo = max(0, center - self.band)
+            hi = min(length, center + self.band + 1)
+
+            # Predecessors of cell j are j, j - 1 and j - 2 of the previous row
+            padded = np.concatenate(([np.inf, np.inf], previous))
+            candidates = np.stack((padded[lo + 2:hi + 2], padded[lo + 1:hi + 1], padded[lo:hi]))
+            step = np.argmin(candidates, axis=0)
+            best = candidates[step, np.arange(hi - lo)]
+            predecessor = np.maximum(np.arange(lo, hi) - step, 0)
+
+            difference = np.abs((reference[lo:hi] - angles + 180.0) % 360.0 - 180.0)
+            costs = np.full(length, np.inf)
+            costs[lo:hi] = best + difference.mean(axis=1)
+            paths = self._paths[i]
+            new_paths = np.zeros_like(paths)
+            new_paths[lo:hi] = paths[predecessor] + difference
+
+            self._costs[i] = costs
+            self._paths[i] = new_paths
+            self._windows[i] = (lo, hi)
+
+    def finish_rep(self):
+        """
+        Scores the completed rep against the best matching reference and starts a new rep.
+
+        Returns:
+        - FormScore: The score, or None if there are no references or the rep could not be aligned.
+        """
+        result = None
+        if self.frame_count:
+            last_angles = self.trajectory[-1]
+            best = None
+            for i, reference in enumerate(self.references):
+                lo, hi = self._windows[i]
+                # Cost of matching the reference frames after each cell against the last frame of the rep
+                difference = np.abs((reference - last_angles + 180.0) % 360.0 - 180.0)
+                tail = np.cumsum(difference[::-1], axis=0)[::-1]
+                tail = np.vstack((tail[1:], np.zeros((1, tail.shape[1]))))
+                totals = self._costs[i][lo:hi] + tail[lo:hi].mean(axis=1)
+                end = lo + int(np.argmin(totals))
+                steps = self.frame_count + len(reference) - 1 - end
+                deviation = totals[end - lo] / steps
+                if np.isfinite(deviation) and (best is None or deviation < best[1]):
+                    best = (i, deviation, (self._paths[i][end] + tail[end]) / steps)
+
+            if best is not None:
+                best_index, deviation, joint_deviation = best
+                worst = int(np.argmax(joint_deviation))
+                score = 100.0 * max(0.0, 1.0 - deviation / self.tolerance)
+                result = FormScore(score, deviation, self.joint_names[worst], float(joint_deviation[worst]),
+                                   best_index)
+            self.rep_length = self.frame_count
+
+        self.last_trajectory = np.array(self.trajectory)
+        self.reset()
+        return result
+
+
+def load_form_scorer(path, joints, band=12, tolerance=45.0):
+    """
+    Loads the reference reps for an exercise if they have been recorded.
+
+    Args:
+    - path (str): Path to the .npz reference file.
+    - joints (dict): Joint name -> landmark triplet used when no reference file exists yet.
+    - band (int): Half width of the DTW band, in reference frames.
+    - tolerance (float): Mean deviation in degrees at which the score drops to 0.
+
+    Returns:
+    - RepFormScorer: Scorer with the stored references, or without references if none were recorded.
+    """
+    if os.path.exists(path):
+        return RepFormScorer.from_file(path, band=band, tolerance=tolerance)
+    return RepFormScorer(joints, band=band, tolerance=tolerance)
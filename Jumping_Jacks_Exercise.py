@@ -6,6 +6,10 @@ import cv2
 import numpy as np
 import time
 import PoseModule5 as pm
+import Station
+import Profiler
+from WarmStart import warm_start
+from SessionStore import SessionStore
 
 
 class PoseEstimator:
@@ -13,9 +17,17 @@ class PoseEstimator:
     Class responsible for estimating the pose from an image and determining jump exercise repetitions.
     """
 
-    def __init__(self):
-        """Initializes the pose detector and other necessary attributes."""
-        self.pose_detector = pm.BodyPoseAnalyzer()
+    def __init__(self, pose_detector=None, session=None):
+        """
+        Initializes the pose detector and other necessary attributes.
+
+        Args:
+        - pose_detector (BodyPoseAnalyzer): Optional detector shared with other estimators.
+        - session (Session): Optional session recording the frames and reps.
+        """
+        self.pose_detector = pose_detector or pm.BodyPoseAnalyzer()
+        self.session = session
+        self.last_ankle_distance = None
         self.previous_time = 0
         self.direction = 0  # 0: starting position, 1: legs apart and arms raised
         self.repetitions = 0
@@ -61,13 +73,37 @@ class PoseEstimator:
         if landmarks:
             left_wrist_y, right_wrist_y = self.get_hand_position(landmarks)
             ankle_distance = self.get_ankle_distance(landmarks)
+            self.last_ankle_distance = ankle_distance
+            repetitions = self.repetitions
             # Check conditions for detecting jump repetitions
             self.detect_jump_repetition(left_wrist_y, right_wrist_y, ankle_distance)
 
             self.draw_workout_info(image, ankle_distance)
+            if self.session:
+                if int(self.repetitions) > int(repetitions):
+                    self.session.record_rep(self.repetitions)
+                self.session.record_frame(ankle_distance, self.repetitions)
 
         return image
 
+    def reset_movement(self):
+        """
+        Forgets the movement in progress, such as a jump left halfway when the athlete switched to
+        another exercise. Completed reps are kept.
+        """
+        self.direction = 0
+        self.repetitions = int(self.repetitions)
+
+    def workout_data(self):
+        """
+        Returns the workout data shown to remote viewers.
+
+        Returns:
+        - dict: Exercise name, repetitions and ankle distance of the latest frame.
+        """
+        return {"exercise": "jumping_jacks", "repetitions": int(self.repetitions),
+                "ankle_distance": self.last_ankle_distance}
+
     def detect_jump_repetition(self, left_wrist_y, right_wrist_y, ankle_distance):
         """Determines jump repetitions based on the wrist and ankle positions."""
         if ankle_distance > 150 and left_wrist_y < 300 and right_wrist_y < 300:
@@ -127,17 +163,35 @@ class PoseEstimator:
 
 def main():
     """Main function to initialize the webcam stream and process each frame."""
-    cap = cv2.VideoCapture(0)
-    estimator = PoseEstimator()
-
-    while True:
-        success, frame = cap.read()
-        frame = cv2.resize(frame, (1280, 720))
-        processed_image = estimator.process_image(frame)
-        estimator.calculate_fps(processed_image)
-
-        cv2.imshow("Workout Tracking", processed_image)
-        cv2.waitKey(1)
+    args = Station.parse_arguments("Jumping jacks station")
+
+    def setup():
+        return SessionStore(), Station.open_stream(args), Station.open_recorder(args)
+
+    cap, pose_detector, resources = warm_start(setup, model_complexity=args.model_complexity,
+                                               recalibrate=args.recalibrate)
+    store, stream, recorder = resources
+    estimator = PoseEstimator(pose_detector, store.session("jumping_jacks"))
+
+    Station.exit_on_stop_signals()
+    Profiler.install(args.profile_port, break_signal=False)
+
+    try:
+        while True:
+            success, frame = cap.read()
+            if not success:
+                break
+            frame = cv2.resize(frame, (1280, 720))
+            processed_image = estimator.process_image(frame)
+            estimator.calculate_fps(processed_image)
+            if stream:
+                stream.publish(processed_image, estimator.workout_data())
+            if not Station.present(processed_image, pose_detector, args, recorder):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        Station.close(cap, args, recorder)
 
 
 if __name__ == "__main__":
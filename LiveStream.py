@@ -0,0 +1,199 @@
+import json
+import time
+import threading
+import cv2
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INDEX_PAGE = b"""<!DOCTYPE html>
+<html>
+<head><title>Aivisiontrain live view</title></head>
+<body style="background:#111;color:#eee;font-family:sans-serif">
+<h2 id="stats">Waiting for the station...</h2>
+<img src="/stream.mjpg" style="max-width:100%">
+<script>
+const events = new EventSource("/events");
+events.onmessage = (event) => {
+    const data = JSON.parse(event.data);
+    document.getElementById("stats").textContent = Object.entries(data)
+        .map(([key, value]) => `${key}: ${typeof value === "number" ? Math.round(value) : value}`).join("  |  ");
+};
+</script>
+</body>
+</html>
+"""
+
+
+class LiveStreamServer:
+    """
+    Streams the processed frames and workout data of a station to any number of viewers.
+
+    The frame loop only hands over a reference to its latest frame. A background thread
+    JPEG-encodes the latest frame once, at most `max_fps` times per second, and every viewer
+    is sent the most recent encoded frame when it is ready for one, so slow viewers skip
+    frames instead of stalling the frame loop or the other viewers.
+
+    Endpoints: "/" (viewer page), "/stream.mjpg" (MJPEG stream), "/events" (server-sent
+    events with the workout data) and "/stats.json" (latest workout data).
+    """
+
+    def __init__(self, host="127.0.0.1", port=8080, quality=80, max_fps=15):
+        """
+        Initializes the server.
+
+        Args:
+        - host (str): Address to listen on. Use "0.0.0.0" to accept viewers from the local network.
+        - port (int): Port to listen on.
+        - quality (int): JPEG quality from 0 to 100.
+        - max_fps (float): Maximum number of frames encoded per second.
+        """
+        self.host = host
+        self.port = port
+        self.quality = quality
+        self.max_fps = max_fps
+
+        self.latest_frame = None
+        self.latest_data = {}
+        self.frame_ready = threading.Event()
+        self.encoded = threading.Condition()
+        self.jpeg = None
+        self.data = {}
+        self.sequence = 0
+        self.running = False
+
+    def start(self):
+        """
+        Starts the HTTP server and the encoder thread.
+
+        Returns:
+        - LiveStreamServer: The server itself.
+        """
+        server = self
+
+        class Handler(LiveStreamHandler):
+            stream = server
+
+        self.http_server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.http_server.daemon_threads = True
+        self.running = True
+        threading.Thread(target=self.http_server.serve_forever, daemon=True).start()
+        threading.Thread(target=self.encode_loop, daemon=True).start()
+        print(f"Live view on http://{self.host}:{self.port}/")
+        return self
+
+    def stop(self):
+        """Stops the server and releases the waiting viewers."""
+        self.running = False
+        self.frame_ready.set()
+        with self.encoded:
+            self.encoded.notify_all()
+        self.http_server.shutdown()
+
+    def publish(self, frame, data):
+        """
+        Hands over the latest processed frame. Never blocks the frame loop.
+
+        Args:
+        - frame (np.ndarray): The processed frame. It must not be modified afterwards.
+        - data (dict): Workout data sent along with the frame, e.g. reps and angle.
+        """
+        self.latest_frame = frame
+        self.latest_data = data
+        self.frame_ready.set()
+
+    def encode_loop(self):
+        """Encodes the latest published frame and wakes up the viewers."""
+        while self.running:
+            started = time.time()
+            self.frame_ready.wait()
+            self.frame_ready.clear()
+            frame, data = self.latest_frame, self.latest_data
+            if frame is None:
+                continue
+
+            success, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if success:
+                with self.encoded:
+                    self.jpeg = jpeg.tobytes()
+                    self.data = data
+                    self.sequence += 1
+                    self.encoded.notify_all()
+            time.sleep(max(0.0, 1 / self.max_fps - (time.time() - started)))
+
+    def wait_frame(self, sequence, timeout=5.0):
+        """
+        Waits for a frame newer than the given one.
+
+        Args:
+        - sequence (int): Sequence number of the last frame the viewer received.
+        - timeout (float): Maximum time to wait, in seconds.
+
+        Returns:
+        - tuple: Sequence number, JPEG bytes and workout data of the latest frame.
+        """
+        with self.encoded:
+            self.encoded.wait_for(lambda: self.sequence > sequence or not self.running, timeout)
+            return self.sequence, self.jpeg, self.data
+
+
+class LiveStreamHandler(BaseHTTPRequestHandler):
+    """Serves one viewer connection of a `LiveStreamServer`."""
+
+    stream = None
+
+    def do_GET(self):
+        try:
+            if self.path == "/":
+                self.send_body("text/html", INDEX_PAGE)
+            elif self.path == "/stats.json":
+                self.send_body("application/json", json.dumps(self.stream.data).encode("utf-8"))
+            elif self.path == "/stream.mjpg":
+                self.send_frames()
+            elif self.path == "/events":
+                self.send_events()
+            else:
+                self.send_error(404)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def send_body(self, content_type, body):
+        """Sends a complete response."""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_frames(self):
+        """Sends the encoded frames as an MJPEG stream until the viewer disconnects."""
+        self.send_response(200)
+        self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        sequence = 0
+        while self.stream.running:
+            latest, jpeg, _ = self.stream.wait_frame(sequence)
+            if latest == sequence or jpeg is None:
+                continue
+            sequence = latest
+            self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n")
+            self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode("ascii"))
+            self.wfile.write(jpeg)
+            self.wfile.write(b"\r\n")
+
+    def send_events(self):
+        """Sends the workout data as server-sent events until the viewer disconnects."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        sequence = 0
+        while self.stream.running:
+            latest, _, data = self.stream.wait_frame(sequence)
+            if latest == sequence:
+                continue
+            sequence = latest
+            self.wfile.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+    def log_message(self, format, *args):
+        """Keeps viewer requests out of the console."""
@@ -0,0 +1,230 @@
+import sys
+import cv2
+import numpy as np
+import PoseModule5 as pm
+import Bicep_Curls_Exercise
+import Squats_Exercise
+
+# Exercise name -> (estimator class, function computing the angle driving the rep counter)
+EXERCISES = {
+    "bicep_curls": (Bicep_Curls_Exercise.PoseEstimator,
+                    lambda estimator, image: estimator.get_right_arm_angle(image)),
+    "squats": (Squats_Exercise.PoseEstimator,
+               lambda estimator, image: (estimator.get_right_leg_angle(image) +
+                                         estimator.get_left_leg_angle(image)) / 2),
+}
+
+
+class OfflineScorer:
+    """
+    Counts the reps of a recorded session with coarse-to-fine temporal inference.
+
+    The coarse pass runs pose inference on one frame out of `stride`. Rep counts only change
+    when the tracked angle reaches either end of the exercise's `ANGLE_RANGE`, so every interval
+    between two samples that changes zone or has a sample within `margin` of either end is a
+    candidate transition. So is every interval next to a local extremum of the coarse signal that
+    may hide a peak within `margin` of either end.
+    The fine pass seeks to each candidate interval and runs inference on all of its frames. The
+    counter of the live `PoseEstimator` then replays the merged signal in frame order, giving
+    the same count as a dense run.
+    """
+
+    def __init__(self, exercise, stride=8, margin=0.15, size=(1280, 720), model_complexity="full"):
+        """
+        Initializes the scorer.
+
+        Args:
+        - exercise (str): One of the keys of `EXERCISES`.
+        - stride (int): Number of frames between two coarse samples.
+        - margin (float): Fraction of the angle range, around either end, treated as a candidate transition.
+        - size (tuple): Size frames are resized to, as in the live frame loop.
+        - model_complexity (str): Pose model tier.
+        """
+        self.estimator_class, self.angle = EXERCISES[exercise]
+        self.stride = stride
+        self.margin = margin
+        self.size = size
+        # Sparse samples are not temporally coherent, so the coarse pass detects on every frame
+        self.coarse_detector = pm.BodyPoseAnalyzer(mode=True, model_complexity=model_complexity)
+        self.fine_detector = pm.BodyPoseAnalyzer(model_complexity=model_complexity)
+        self.estimator = self.estimator_class(pose_detector=self.coarse_detector)
+        self.low, self.high = self.estimator_class.ANGLE_RANGE
+        self.inferences = 0
+
+    def measure(self, pose_detector, frame):
+        """
+        Runs pose inference on a frame and computes the tracked angle.
+
+        Args:
+        - pose_detector (BodyPoseAnalyzer): Detector to run.
+        - frame (np.ndarray): The decoded frame.
+
+        Returns:
+        - float: The angle, or None if no person was found.
+        """
+        self.inferences += 1
+        frame = cv2.resize(frame, self.size)
+        self.estimator.pose_detector = pose_detector
+        pose_detector.get_pose(frame, False)
+        if not pose_detector.get_landmark_positions(frame, False):
+            return None
+        return self.angle(self.estimator, frame)
+
+    def coarse_pass(self, cap):
+        """
+        Samples the tracked angle on one frame out of `stride`.
+
+        Args:
+        - cap (cv2.VideoCapture): The opened recording.
+
+        Returns:
+        - tuple: Dict frame index -> angle of the sampled frames, and the number of frames.
+        """
+        samples = {}
+        index = 0
+        while cap.grab():
+            if index % self.stride == 0:
+                success, frame = cap.retrieve()
+                if success:
+                    samples[index] = self.measure(self.coarse_detector, frame)
+            index += 1
+        return samples, index
+
+    def zone(self, angle):
+        """Returns 0 at the low end of the angle range, 2 at the high end and 1 in between."""
+        if angle <= self.low:
+            return 0
+        if angle >= self.high:
+            return 2
+        return 1
+
+    def near_end(self, angle):
+        """Returns True if the angle is within the margin of either end of the angle range."""
+        margin = self.margin * (self.high - self.low)
+        return angle <= self.low + margin or angle >= self.high - margin
+
+    def candidate_windows(self, samples, frame_count):
+        """
+        Finds the intervals between coarse samples where the rep count may change.
+
+        Args:
+        - samples (dict): Frame index -> angle of the sampled frames.
+        - frame_count (int): Number of frames in the recording.
+
+        Returns:
+        - list: Merged (first, last) frame index ranges, inclusive.
+        """
+        indices = sorted(samples)
+        bounds = list(zip(indices, indices[1:] + [frame_count - 1]))
+        values = [samples[index] for index in indices] + [samples.get(frame_count - 1)]
+        # The signal may cross an end and come back between two samples close to it, including at
+        # the start and the end of the recording
+        candidates = [first is None or last is None or self.zone(first) != self.zone(last) or
+                      self.near_end(first) or self.near_end(last)
+                      for first, last in zip(values, values[1:])]
+
+        # A sample at a local extremum may hide a peak between two samples, reaching at most
+        # as far past the sample as the signal moved between neighbouring samples
+        for i in range(1, len(values) - 1):
+            previous, value, following = values[i - 1:i + 2]
+            if None in (previous, value, following):
+                # The shape of the signal around the sample is unknown
+                candidates[i - 1] = candidates[i] = True
+            elif (value - previous) * (following - value) <= 0:
+                reach = max(abs(value - previous), abs(following - value))
+                if self.near_end(value + reach) or self.near_end(value - reach):
+                    candidates[i - 1] = candidates[i] = True
+
+        windows = []
+        for (start, end), candidate in zip(bounds, candidates):
+            if candidate:
+                if windows and windows[-1][1] >= start:
+                    windows[-1] = (windows[-1][0], end)
+                else:
+                    windows.append((start, end))
+        return windows
+
+    def fine_pass(self, cap, windows, signal):
+        """
+        Runs inference on every frame of the candidate windows, seeking in the decoder.
+
+        Args:
+        - cap (cv2.VideoCapture): The opened recording.
+        - windows (list): Inclusive (first, last) frame index ranges.
+        - signal (dict): Frame index -> angle, updated in place.
+        """
+        for start, end in windows:
+            # The windows are not contiguous, so tracking starts over from a fresh detection in each
+            self.fine_detector.pose_model.reset()
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            for index in range(start, end + 1):
+                success, frame = cap.read()
+                if not success:
+                    break
+                signal[index] = self.measure(self.fine_detector, frame)
+
+    def count(self, signal):
+        """
+        Replays the signal through the live rep counter.
+
+        Args:
+        - signal (dict): Frame index -> angle.
+
+        Returns:
+        - float: Number of repetitions.
+        """
+        counter = self.estimator_class(pose_detector=self.coarse_detector)
+        for index in sorted(signal):
+            if signal[index] is not None:
+                counter.get_bar_color(np.interp(signal[index], (self.low, self.high), (0, 100)))
+        return counter.repetitions
+
+    def score(self, path):
+        """
+        Counts the reps of a recording with coarse-to-fine inference.
+
+        Args:
+        - path (str): Path to the video file.
+
+        Returns:
+        - dict: Repetitions, number of frames and number of pose inferences.
+        """
+        self.inferences = 0
+        cap = cv2.VideoCapture(path)
+        signal, frame_count = self.coarse_pass(cap)
+        self.fine_pass(cap, self.candidate_windows(signal, frame_count), signal)
+        cap.release()
+        return {"repetitions": self.count(signal), "frames": frame_count, "inferences": self.inferences}
+
+    def score_dense(self, path):
+        """
+        Counts the reps of a recording with inference on every frame, as a reference.
+
+        Args:
+        - path (str): Path to the video file.
+
+        Returns:
+        - dict: Repetitions, number of frames and number of pose inferences.
+        """
+        self.inferences = 0
+        cap = cv2.VideoCapture(path)
+        signal = {}
+        success, frame = cap.read()
+        while success:
+            signal[len(signal)] = self.measure(self.fine_detector, frame)
+            success, frame = cap.read()
+        cap.release()
+        return {"repetitions": self.count(signal), "frames": len(signal), "inferences": self.inferences}
+
+
+def main():
+    """Scores the recording given on the command line: OfflineScoring.py <video> <exercise> [--dense]"""
+    path, exercise = sys.argv[1], sys.argv[2]
+    scorer = OfflineScorer(exercise)
+    print(f"Coarse-to-fine: {scorer.score(path)}")
+    if "--dense" in sys.argv[3:]:
+        print(f"Dense: {scorer.score_dense(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import os
+import hashlib
+from collections import OrderedDict
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+
+class PhraseCache:
+    """
+    Caches synthesized audio of fixed phrases, so they can be played back without waiting
+    on the text-to-speech engine.
+
+    Phrases are keyed by their text and the engine's voice settings. Rendered WAV files are
+    kept on disk across runs, and the most recently used ones are also kept in memory. Both
+    levels evict the least recently used phrases when full.
+    """
+
+    def __init__(self, engine, directory="tts_cache", max_entries=64, max_memory_entries=16):
+        """
+        Initializes the cache.
+
+        Args:
+        - engine (pyttsx3.Engine): Engine used to render phrases.
+        - directory (str): Directory holding the rendered WAV files.
+        - max_entries (int): Maximum number of phrases kept on disk.
+        - max_memory_entries (int): Maximum number of phrases kept in memory.
+        """
+        self.engine = engine
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_memory_entries = max_memory_entries
+        self.memory = OrderedDict()
+
+    def key(self, text):
+        """
+        Computes the cache key of a phrase for the current voice settings.
+
+        Args:
+        - text (str): The phrase.
+
+        Returns:
+        - str: The cache key.
+        """
+        settings = [text]
+        for name in ("voice", "rate", "volume"):
+            settings.append(str(self.engine.getProperty(name)))
+        return hashlib.sha1("\n".join(settings).encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        """Returns the path of the WAV file for the given key."""
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def get(self, text):
+        """
+        Looks up the audio of a phrase in memory, then on disk.
+
+        Args:
+        - text (str): The phrase.
+
+        Returns:
+        - bytes: The WAV data, or None if the phrase has not been rendered.
+        """
+        key = self.key(text)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+        self.remember(key, data)
+        return data
+
+    def remember(self, key, data):
+        """Stores WAV data in memory, evicting the least recently used phrase if needed."""
+        self.memory[key] = data
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def render(self, phrases):
+        """
+        Renders the phrases that are not cached yet.
+
+        Args:
+        - phrases (iterable): The phrases to render.
+        """
+        if not os.path.exists(self.directory):
+            os.mkdir(self.directory)
+
+        missing = [text for text in phrases if not os.path.exists(self.path(self.key(text)))]
+        for text in missing:
+            self.engine.save_to_file(text, self.path(self.key(text)))
+        if missing:
+            self.engine.runAndWait()
+        self.evict()
+
+    def evict(self):
+        """Deletes the least recently used WAV files beyond `max_entries`."""
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".wav")]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for path in files[self.max_entries:]:
+            os.remove(path)
+            self.memory.pop(os.path.splitext(os.path.basename(path))[0], None)
+
+    def play(self, text):
+        """
+        Plays a cached phrase.
+
+        Args:
+        - text (str): The phrase.
+
+        Returns:
+        - bool: True if the phrase was played, False if it is not cached or playback is unavailable.
+        """
+        if winsound is None:
+            return False
+        data = self.get(text)
+        if data is None:
+            return False
+        winsound.PlaySound(data, winsound.SND_MEMORY)
+        return True
@@ -2,31 +2,51 @@
 #/// Modified from :-
 #/// Mediapipe, 2023. Pose landmark detection guide [online]. Google for Developers.
 #/// [Accessed 14 Aug 2023]. Available from: https://developers.google.com/mediapipe/solutions/vision/pose_landmarker
+import os
 import cv2
+import json
+import platform
 import mediapipe as mp
 import time
 import math
 
+# MediaPipe pose model tiers, from the fastest to the most accurate
+MODEL_COMPLEXITY_TIERS = {"lite": 0, "full": 1, "heavy": 2}
+
+# "auto" picks the most accurate tier reaching TARGET_FPS on this machine
+MODEL_COMPLEXITY = "auto"
+TARGET_FPS = 25
+CALIBRATION_CACHE = os.path.join(os.path.expanduser("~"), ".aivisiontrain", "model_complexity.json")
+
 
 class BodyPoseAnalyzer:
     """
     This class uses the MediaPipe library to analyze and visualize body poses.
     """
 
-    def __init__(self, mode=False, upper_body_only=False, smooth=True,
+    def __init__(self, mode=False, model_complexity="full", smooth=True,
                  min_detection_confidence=0.5, min_tracking_confidence=0.5):
         """
         Initializes the pose analyzer with the provided parameters.
+
+        `model_complexity` is one of "lite", "full" and "heavy" (or 0, 1 and 2).
         """
+        if model_complexity in MODEL_COMPLEXITY_TIERS:
+            model_complexity = MODEL_COMPLEXITY_TIERS[model_complexity]
+        if model_complexity not in MODEL_COMPLEXITY_TIERS.values():
+            raise ValueError(f"Unknown model complexity: {model_complexity}")
+
         self.mode = mode
-        self.upper_body_only = upper_body_only
+        self.model_complexity = model_complexity
         self.smooth = smooth
         self.min_tracking_confidence = min_tracking_confidence
         self.min_detection_confidence = min_detection_confidence
 
         self.drawing_utils = mp.solutions.drawing_utils
         self.pose_utils = mp.solutions.pose
-        self.pose_model = self.pose_utils.Pose(self.mode, self.upper_body_only, self.smooth,
+        self.pose_model = self.pose_utils.Pose(static_image_mode=self.mode,
+                                               model_complexity=self.model_complexity,
+                                               smooth_landmarks=self.smooth,
                                                min_detection_confidence=self.min_detection_confidence,
                                                min_tracking_confidence=self.min_tracking_confidence)
 
@@ -85,16 +105,161 @@ class BodyPoseAnalyzer:
         return angle
 
 
+def benchmark_model_complexity(frames, model_complexity, warmup=3):
+    """
+    Measures the pose inference frame rate of a model tier.
+
+    Args:
+    - frames (list): Frames to run inference on.
+    - model_complexity (str): Model tier to benchmark.
+    - warmup (int): Number of leading frames excluded from the measurement.
+
+    Returns:
+    - tuple: Frames per second, and whether a person was found on every measured frame.
+    """
+    analyzer = BodyPoseAnalyzer(model_complexity=model_complexity)
+    try:
+        for frame in frames[:warmup]:
+            analyzer.get_pose(frame.copy(), False)
+
+        detections = 0
+        start_time = time.perf_counter()
+        for frame in frames[warmup:]:
+            analyzer.get_pose(frame.copy(), False)
+            detections += analyzer.results.pose_landmarks is not None
+        fps = (len(frames) - warmup) / (time.perf_counter() - start_time)
+    finally:
+        analyzer.pose_model.close()
+    return fps, detections == len(frames) - warmup
+
+
+def calibration_key(target_fps):
+    """Returns the key identifying this machine and frame rate target in the calibration cache."""
+    return f"{platform.node()}|{platform.processor()}|{os.cpu_count()}|{target_fps}"
+
+
+def calibrate_model_complexity(frames, target_fps=TARGET_FPS, cache_path=CALIBRATION_CACHE):
+    """
+    Picks the most accurate model tier reaching the target frame rate on this machine, and caches it.
+
+    Inference runs faster when nobody is in frame, so a tier chosen without a person on every frame
+    is not cached, and no tier more accurate than "full" is used for this run.
+
+    Args:
+    - frames (list): Frames to benchmark on, ideally showing a person.
+    - target_fps (float): Minimum pose inference frame rate.
+    - cache_path (str): JSON file caching the chosen tier per machine.
+
+    Returns:
+    - str: The chosen tier. The lite tier is chosen when no tier reaches the target.
+    """
+    chosen, person_found = "lite", True
+    for tier in sorted(MODEL_COMPLEXITY_TIERS, key=MODEL_COMPLEXITY_TIERS.get, reverse=True):
+        fps, person_found = benchmark_model_complexity(frames, tier)
+        print(f"Model complexity {tier}: {fps:.1f} FPS")
+        if fps >= target_fps:
+            chosen = tier
+            break
+
+    if not person_found:
+        print("No person found on the calibration frames, the model complexity will be calibrated again")
+        return min(chosen, "full", key=MODEL_COMPLEXITY_TIERS.get)
+
+    cache = read_calibration_cache(cache_path)
+    cache[calibration_key(target_fps)] = chosen
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, "w") as f:
+        json.dump(cache, f, indent=2)
+    return chosen
+
+
+def read_calibration_cache(cache_path=CALIBRATION_CACHE):
+    """
+    Reads the calibration cache.
+
+    Args:
+    - cache_path (str): JSON file caching the chosen tier per machine.
+
+    Returns:
+    - dict: Calibration key -> tier. Empty if the file is missing or unreadable, so a corrupt
+      cache only means calibrating again.
+    """
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def cached_model_complexity(setting=MODEL_COMPLEXITY, target_fps=TARGET_FPS, cache_path=CALIBRATION_CACHE,
+                            recalibrate=False):
+    """
+    Resolves the model tier without calibrating.
+
+    Args:
+    - setting (str): A tier name, or "auto".
+    - target_fps (float): Minimum pose inference frame rate in "auto" mode.
+    - cache_path (str): JSON file caching the chosen tier per machine.
+    - recalibrate (bool): Ignore the cached tier in "auto" mode.
+
+    Returns:
+    - str: The tier to run with, or None if this machine still needs to be calibrated.
+    """
+    if setting != "auto":
+        return setting
+    if recalibrate:
+        return None
+
+    cached = read_calibration_cache(cache_path).get(calibration_key(target_fps))
+    return cached if cached in MODEL_COMPLEXITY_TIERS else None
+
+
+def startup_model_complexity(cap, setting=MODEL_COMPLEXITY, target_fps=TARGET_FPS, cache_path=CALIBRATION_CACHE,
+                             frame_count=15, size=(1280, 720), recalibrate=False):
+    """
+    Resolves the model tier to run with. In "auto" mode, the tier cached for this machine is used,
+    or the tiers are calibrated on frames read from the camera.
+
+    Args:
+    - cap (cv2.VideoCapture): Camera to read calibration frames from.
+    - setting (str): A tier name, or "auto".
+    - target_fps (float): Minimum pose inference frame rate in "auto" mode.
+    - cache_path (str): JSON file caching the chosen tier per machine.
+    - frame_count (int): Number of frames to calibrate on.
+    - size (tuple): Size the frames are resized to, as in the frame loop.
+    - recalibrate (bool): Calibrate again in "auto" mode, even if a tier is cached.
+
+    Returns:
+    - str: The tier to run with.
+    """
+    cached = cached_model_complexity(setting, target_fps, cache_path, recalibrate)
+    if cached:
+        return cached
+
+    frames = []
+    while len(frames) < frame_count:
+        success, frame = cap.read()
+        if not success:
+            break
+        frames.append(cv2.resize(frame, size) if size else frame)
+    if len(frames) < frame_count:
+        return "full"
+    return calibrate_model_complexity(frames, target_fps, cache_path)
+
+
 def main():
     """
     Main function to run the body pose analyzer.
     """
     cap = cv2.VideoCapture(0)
     prev_time = 0
-    analyzer = BodyPoseAnalyzer()
+    analyzer = BodyPoseAnalyzer(model_complexity=startup_model_complexity(cap, size=None))
 
     while True:
         success, frame = cap.read()
+        if not success:
+            break
         frame = analyzer.get_pose(frame)
         landmarks = analyzer.get_landmark_positions(frame, draw=False)
 
@@ -104,7 +269,11 @@ def main():
 
         cv2.putText(frame, f"FPS: {int(fps)}", (70, 50), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 0), 3)
         cv2.imshow("Body Pose Analysis", frame)
-        cv2.waitKey(1)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+
+    cap.release()
+    cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,226 @@
+import os
+import sys
+import time
+import socket
+import signal
+import threading
+from collections import Counter
+
+# Modules whose code only runs while waiting on another thread, the network, the microphone or the speaker
+IO_MODULES = ("threading", "queue", "socket", "socketserver", "selectors", "ssl", "subprocess", "http", "urllib3",
+              "requests", "openai", "speech_recognition", "pyaudio", "pyttsx3")
+
+# Functions of this repo that wrap native blocking calls: the camera read, the window and the sound playback
+IO_FUNCTIONS = ("WarmStart.PrimedCapture.read", "Station.present", "PhraseCache.PhraseCache.play")
+
+# Classes whose methods get their own line in the summary
+ATTRIBUTED_CLASSES = ("BodyPoseAnalyzer.", "PoseEstimator.")
+
+
+class SamplingProfiler:
+    """
+    Time-boxed sampling profiler that can be triggered in a running station.
+
+    Nothing runs until a profile is requested: the trigger starts a thread sampling the
+    stacks of all other threads every `interval` seconds for the requested duration. The
+    stacks are written in the folded format read by flamegraph.pl and speedscope, along with a
+    summary attributing the samples to `BodyPoseAnalyzer` methods, exercise `PoseEstimator`
+    methods and I/O waits. Samples are taken whenever the sampler gets the GIL, so short bursts
+    of pure Python code may be under-represented next to native code and I/O waits.
+    """
+
+    def __init__(self, directory="profiles", interval=0.005):
+        """
+        Args:
+        - directory (str): Directory the profiles are written to.
+        - interval (float): Time between two samples, in seconds.
+        """
+        self.directory = directory
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.active = False
+
+    def trigger(self, duration=10.0):
+        """
+        Starts capturing a profile in the background.
+
+        Args:
+        - duration (float): Length of the profile, in seconds.
+
+        Returns:
+        - bool: False if a profile is already being captured.
+        """
+        with self.lock:
+            if self.active:
+                return False
+            self.active = True
+        threading.Thread(target=self.run, args=(duration,), name="profiler", daemon=True).start()
+        return True
+
+    def run(self, duration):
+        """Samples the stacks for the given duration and writes the profile."""
+        # A shorter GIL switch interval lets the sampler in while other threads run Python code
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, self.interval / 10))
+        try:
+            own_thread = threading.get_ident()
+            stacks = Counter()
+            end_time = time.perf_counter() + duration
+            while time.perf_counter() < end_time:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident != own_thread:
+                        stacks[(names.get(ident, str(ident)),) + self.stack(frame)] += 1
+                time.sleep(self.interval)
+            self.write(stacks)
+        finally:
+            sys.setswitchinterval(switch_interval)
+            with self.lock:
+                self.active = False
+
+    def stack(self, frame):
+        """
+        Describes the stack of a frame, from the outermost call to the innermost one.
+
+        Args:
+        - frame (frame): The innermost frame.
+
+        Returns:
+        - tuple: One "function (file)" entry per call, methods being named "Class.method", ending
+          with an "[io] module" or "[io] function" entry when the innermost call is waiting.
+        """
+        entries = []
+        innermost = True
+        while frame is not None:
+            code = frame.f_code
+            module = frame.f_globals.get("__name__", "")
+            name = code.co_name
+            # The class is read from the instance, as code objects only know it from Python 3.11
+            if code.co_argcount and code.co_varnames[0] == "self":
+                instance = frame.f_locals.get("self")
+                if instance is not None:
+                    name = f"{type(instance).__name__}.{name}"
+
+            if innermost:
+                if module.split(".")[0] in IO_MODULES:
+                    entries.append(f"[io] {module}")
+                elif f"{module}.{name}" in IO_FUNCTIONS:
+                    entries.append(f"[io] {module}.{name}")
+                innermost = False
+            entries.append(f"{name} ({os.path.basename(code.co_filename)})")
+            frame = frame.f_back
+        return tuple(reversed(entries))
+
+    def category(self, stack):
+        """Returns the summary line a sampled stack is attributed to."""
+        if stack[-1].startswith("[io]"):
+            return "I/O wait"
+        for entry in reversed(stack):
+            if entry.startswith(ATTRIBUTED_CLASSES):
+                return entry.split(" (")[0]
+        return "other"
+
+    def write(self, stacks):
+        """
+        Writes the folded stacks and the summary.
+
+        Args:
+        - stacks (Counter): Sampled stacks -> number of samples.
+        """
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        base = os.path.join(self.directory, f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+        with open(f"{base}.folded", "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(";".join(entry.replace(";", ",") for entry in stack) + f" {count}\n")
+
+        by_thread = {}
+        for stack, count in stacks.items():
+            by_thread.setdefault(stack[0], Counter())[self.category(stack)] += count
+        with open(f"{base}.summary.txt", "w") as f:
+            for thread_name, categories in by_thread.items():
+                total = sum(categories.values())
+                f.write(f"Thread {thread_name}: {total} samples\n")
+                for category, count in categories.most_common():
+                    f.write(f"  {100 * count / total:5.1f} %  {category}\n")
+        print(f"Profile written to {base}.folded")
+
+    def listen(self, port):
+        """
+        Accepts "profile [seconds]" commands on a local TCP port, from a background thread.
+
+        Args:
+        - port (int): Port on 127.0.0.1 to listen on.
+        """
+        server = socket.create_server(("127.0.0.1", port))
+        threading.Thread(target=self.serve, args=(server,), name="profiler-control", daemon=True).start()
+
+    def serve(self, server):
+        """Answers the control commands received on the server socket."""
+        while True:
+            connection, _ = server.accept()
+            # A malformed request or a client hanging up must not stop the control thread
+            try:
+                with connection:
+                    connection.sendall(self.answer(connection.makefile().readline()))
+            except (OSError, ValueError):
+                pass
+
+    def answer(self, request):
+        """
+        Runs one control command.
+
+        Args:
+        - request (str): The command line, e.g. "profile 5".
+
+        Returns:
+        - bytes: The reply sent back to the client.
+        """
+        command = request.split()
+        if not command or command[0] != "profile" or len(command) > 2:
+            return b"unknown command\n"
+        try:
+            duration = float(command[1]) if len(command) > 1 else 10.0
+        except ValueError:
+            return b"unknown command\n"
+        if not 0 < duration < float("inf"):
+            return b"unknown command\n"
+        return b"started\n" if self.trigger(duration) else b"busy\n"
+
+
+def install(port=None, duration=10.0, directory="profiles", break_signal=True):
+    """
+    Makes the running process profilable on demand, through SIGUSR1 (Ctrl+Break on Windows)
+    and optionally through a local control port.
+
+    Args:
+    - port (int): Local control port, or None for the signal only.
+    - duration (float): Length of the profiles triggered by the signal, in seconds.
+    - directory (str): Directory the profiles are written to.
+    - break_signal (bool): Whether Ctrl+Break triggers a profile on Windows. Stations use it to stop
+      instead, and are profiled through the control port there.
+
+    Returns:
+    - SamplingProfiler: The installed profiler.
+    """
+    profiler = SamplingProfiler(directory)
+    trigger_signal = getattr(signal, "SIGUSR1", None) or (getattr(signal, "SIGBREAK", None) if break_signal else None)
+    if trigger_signal is not None:
+        signal.signal(trigger_signal, lambda signum, frame: profiler.trigger(duration))
+    if port:
+        profiler.listen(port)
+    return profiler
+
+
+def main():
+    """Asks a running station to capture a profile: Profiler.py <port> [seconds]"""
+    port = int(sys.argv[1])
+    duration = sys.argv[2] if len(sys.argv) > 2 else "10"
+    with socket.create_connection(("127.0.0.1", port)) as connection:
+        connection.sendall(f"profile {duration}\n".encode("ascii"))
+        print(connection.makefile().readline().strip())
+
+
+if __name__ == "__main__":
+    main()
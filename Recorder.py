@@ -0,0 +1,163 @@
+import time
+import queue
+import threading
+import cv2
+import numpy as np
+
+# One record of a skeleton trace: capture time, then the pixel position and visibility of the 33 landmarks
+LANDMARK_RECORD = np.dtype([("time", "<f8"), ("x", "<i2", 33), ("y", "<i2", 33), ("visibility", "u1", 33)])
+
+
+class BackgroundRecorder:
+    """
+    Writes recorded items from a background thread through a bounded queue.
+
+    `record` never blocks the frame loop: when the writer falls behind and the queue is
+    full, the item is dropped and counted in `dropped`.
+    """
+
+    def __init__(self, path, queue_size=64):
+        """
+        Initializes the recorder and starts the writer thread.
+
+        Args:
+        - path (str): Output file.
+        - queue_size (int): Maximum number of items waiting to be written.
+        """
+        self.path = path
+        self.items = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def record(self, frame, landmarks):
+        """
+        Queues the processed frame and its landmarks for writing.
+
+        Args:
+        - frame (np.ndarray): The processed frame. It must not be modified afterwards.
+        - landmarks (list): List of landmark positions, empty if no person was found.
+        """
+        item = self.prepare(frame, landmarks)
+        if item is None:
+            return
+        try:
+            self.items.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, frame, landmarks):
+        """Returns the item to write for a frame, or None to skip the frame."""
+        raise NotImplementedError
+
+    def write_loop(self):
+        """Writes the queued items until the recorder is closed."""
+        self.open()
+        while True:
+            item = self.items.get()
+            if item is None:
+                break
+            self.write(item)
+        self.finish()
+
+    def open(self):
+        """Opens the output file, on the writer thread."""
+
+    def write(self, item):
+        """Writes one item, on the writer thread."""
+        raise NotImplementedError
+
+    def finish(self):
+        """Closes the output file, on the writer thread."""
+
+    def close(self):
+        """Writes the remaining items and closes the output file."""
+        self.items.put(None)
+        self.writer.join()
+        if self.dropped:
+            print(f"Recorder dropped {self.dropped} items writing {self.path}")
+
+
+class VideoRecorder(BackgroundRecorder):
+    """
+    Encodes the processed frames, with their overlays, into a video file.
+
+    Frames arrive at the speed of pose inference and some may be dropped, so each frame is
+    written according to the time it was recorded: the previous frame is repeated to fill the
+    gap before it, and a frame arriving before its slot in the video is skipped. The video
+    therefore plays back in real time whatever the frame rate of the station.
+    """
+
+    def __init__(self, path, fps=30, size=(1280, 720), queue_size=64):
+        """
+        Args:
+        - path (str): Output video file, e.g. "session.mp4".
+        - fps (float): Frame rate of the video file.
+        - size (tuple): Frame size.
+        - queue_size (int): Maximum number of frames waiting to be encoded.
+        """
+        self.fps = fps
+        self.size = size
+        super().__init__(path, queue_size)
+
+    def prepare(self, frame, landmarks):
+        return time.monotonic(), frame
+
+    def open(self):
+        self.video = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, self.size)
+        self.start_time = None
+        self.previous_frame = None
+        self.written = 0
+
+    def write(self, item):
+        recorded_time, frame = item
+        if self.start_time is None:
+            self.start_time = recorded_time
+        slot = int((recorded_time - self.start_time) * self.fps)
+        while self.written < slot:
+            self.video.write(self.previous_frame)
+            self.written += 1
+        if self.written == slot:
+            self.video.write(frame)
+            self.written += 1
+        self.previous_frame = frame
+
+    def finish(self):
+        self.video.release()
+
+
+class LandmarkRecorder(BackgroundRecorder):
+    """Writes a compact skeleton trace of the landmarks instead of pixels."""
+
+    def prepare(self, frame, landmarks):
+        if not landmarks:
+            return None
+        points = np.asarray(landmarks, dtype=np.float32)
+        record = np.zeros(1, dtype=LANDMARK_RECORD)
+        record["time"] = time.time()
+        record["x"] = points[:, 1]
+        record["y"] = points[:, 2]
+        record["visibility"] = np.clip(points[:, 3], 0, 1) * 255
+        return record.tobytes()
+
+    def open(self):
+        self.file = open(self.path, "ab")
+
+    def write(self, item):
+        self.file.write(item)
+
+    def finish(self):
+        self.file.close()
+
+
+def load_landmark_trace(path):
+    """
+    Reads a skeleton trace written by `LandmarkRecorder`.
+
+    Args:
+    - path (str): The trace file.
+
+    Returns:
+    - np.ndarray: Structured array with the "time", "x", "y" and "visibility" (0-255) of every recorded frame.
+    """
+    return np.fromfile(path, dtype=LANDMARK_RECORD)
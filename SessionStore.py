@@ -0,0 +1,241 @@
+import os
+import io
+import glob
+import time
+import queue
+import atexit
+import itertools
+import threading
+import numpy as np
+
+# Columns of every table, with the dtype they are stored with
+TABLES = {
+    "frames": (("session", np.int64), ("time", np.float64), ("exercise", str), ("angle", np.float32),
+               ("repetitions", np.float32)),
+    "reps": (("session", np.int64), ("time", np.float64), ("exercise", str), ("repetitions", np.float32),
+             ("form_score", np.float32)),
+    "interactions": (("session", np.int64), ("time", np.float64), ("kind", str), ("prompt", str),
+                     ("response", str)),
+    "workers": (("session", np.int64), ("time", np.float64), ("worker", str), ("pid", np.int64),
+                ("cpu_percent", np.float32), ("rss_mb", np.float32), ("restarts", np.int32)),
+}
+
+
+class Session:
+    """
+    Handle recording the events of one workout or assistant session into a `SessionStore`.
+    """
+
+    def __init__(self, store, session_id, exercise):
+        """
+        Args:
+        - store (SessionStore): The store receiving the events.
+        - session_id (int): Identifier of the session.
+        - exercise (str): Name of the exercise, or "assistant".
+        """
+        self.store = store
+        self.session_id = session_id
+        self.exercise = exercise
+
+    def record_frame(self, angle, repetitions):
+        """Records the tracked value (joint angle, or ankle distance for jumping jacks) and rep count of one frame."""
+        self.store.append("frames", (self.session_id, time.time(), self.exercise, angle, repetitions))
+
+    def record_rep(self, repetitions, form_score=None):
+        """Records a completed rep and its form score, if the rep was scored."""
+        score = np.nan if form_score is None else form_score
+        self.store.append("reps", (self.session_id, time.time(), self.exercise, repetitions, score))
+
+    def record_interaction(self, kind, prompt, response):
+        """Records an assistant prompt and its response."""
+        self.store.append("interactions", (self.session_id, time.time(), kind, prompt, response))
+
+    def record_worker(self, worker, pid, cpu_percent, rss_mb, restarts):
+        """Records the CPU usage, resident memory and restart count of a supervised worker process."""
+        self.store.append("workers", (self.session_id, time.time(), worker, pid, cpu_percent, rss_mb, restarts))
+
+
+class SessionStore:
+    """
+    Append-only columnar store for workout sessions.
+
+    Events are queued by the caller and written by a background thread, so recording never
+    blocks the frame loop. Rows are buffered per table and written as one columnar block when
+    `batch_size` rows are buffered or `flush_interval` seconds have passed. Blocks are appended
+    to one data file per table, day and process, next to an index holding the session and time range of
+    every block, so range queries only read the blocks they need.
+    """
+
+    def __init__(self, directory="sessions", batch_size=1024, flush_interval=2.0):
+        """
+        Initializes the store and starts the writer thread.
+
+        Args:
+        - directory (str): Directory holding the data and index files.
+        - batch_size (int): Number of rows buffered per table before a block is written.
+        - flush_interval (float): Maximum time in seconds a row stays buffered.
+        """
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.events = queue.Queue()
+        self.buffers = {table: [] for table in TABLES}
+        self.closed = False
+        self.session_counter = itertools.count()
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def session(self, exercise):
+        """
+        Starts a new session.
+
+        Args:
+        - exercise (str): Name of the exercise, or "assistant".
+
+        Returns:
+        - Session: Handle recording the events of the session.
+        """
+        # Start time in milliseconds, followed by 10 bits of the process ID and a 10-bit counter, so sessions
+        # started within one clock tick by one process or by several stations get different IDs
+        milliseconds = time.time_ns() // 1000000
+        session_id = (milliseconds << 20) | (os.getpid() % 1024) << 10 | next(self.session_counter) % 1024
+        return Session(self, session_id, exercise)
+
+    def append(self, table, row):
+        """
+        Queues a row for writing.
+
+        Args:
+        - table (str): Name of the table.
+        - row (tuple): One value per column of the table.
+        """
+        self.events.put((table, row))
+
+    def write_loop(self):
+        """Collects queued rows and writes them in batches until the store is closed."""
+        last_flush = time.time()
+        while True:
+            try:
+                event = self.events.get(timeout=self.flush_interval)
+            except queue.Empty:
+                event = ()
+
+            if event is None:
+                self.flush()
+                return
+            if event:
+                table, row = event
+                self.buffers[table].append(row)
+                if len(self.buffers[table]) >= self.batch_size:
+                    self.flush(table)
+
+            if time.time() - last_flush >= self.flush_interval:
+                self.flush()
+                last_flush = time.time()
+
+    def flush(self, table=None):
+        """
+        Writes the buffered rows as columnar blocks.
+
+        Args:
+        - table (str): Table to flush. All tables are flushed when omitted.
+        """
+        for name in [table] if table else TABLES:
+            rows = self.buffers[name]
+            if not rows:
+                continue
+            self.buffers[name] = []
+
+            columns = {}
+            for (column, dtype), values in zip(TABLES[name], zip(*rows)):
+                columns[column] = np.array(values, dtype=dtype)
+
+            # Blocks never span midnight, so the day in the file name covers all of their rows
+            days = np.array([time.strftime("%Y%m%d", time.localtime(t)) for t in columns["time"]])
+            for day in np.unique(days):
+                in_day = days == day
+                self.write_block(name, str(day), {column: values[in_day] for column, values in columns.items()})
+
+    def write_block(self, table, day, columns):
+        """
+        Appends one columnar block to the data file of a table and day, and indexes it.
+
+        Args:
+        - table (str): Name of the table.
+        - day (str): Day of the rows, as "YYYYMMDD".
+        - columns (dict): Column name -> np.ndarray of the rows.
+        """
+        block = io.BytesIO()
+        np.savez(block, **columns)
+        data = block.getvalue()
+
+        # Every process writes its own files, so concurrent stations never interleave blocks
+        base = os.path.join(self.directory, f"{table}-{day}-{os.getpid()}")
+        with open(f"{base}.blocks", "ab") as f:
+            offset = f.tell()
+            f.write(data)
+        with open(f"{base}.index", "a") as f:
+            f.write(f"{offset},{len(data)},{columns['session'].min()},{columns['session'].max()},"
+                    f"{float(columns['time'].min())!r},{float(columns['time'].max())!r}\n")
+
+    def close(self):
+        """Writes all queued rows and stops the writer thread."""
+        if self.closed:
+            return
+        self.closed = True
+        self.events.put(None)
+        self.writer.join()
+
+    def query(self, table, session_id=None, start=None, end=None):
+        """
+        Reads the rows of a table, optionally restricted to one session and a time range.
+        Rows still buffered by the writer thread are not included.
+
+        Args:
+        - table (str): Name of the table.
+        - session_id (int): Only return rows of this session.
+        - start (float): Only return rows recorded at or after this UNIX time.
+        - end (float): Only return rows recorded before this UNIX time.
+
+        Returns:
+        - dict: Column name -> np.ndarray of the matching rows.
+        """
+        parts = {column: [] for column, _ in TABLES[table]}
+        first_day = time.strftime("%Y%m%d", time.localtime(start)) if start is not None else None
+        last_day = time.strftime("%Y%m%d", time.localtime(end)) if end is not None else None
+        for index_path in sorted(glob.glob(os.path.join(self.directory, f"{table}-*.index"))):
+            day = os.path.basename(index_path).split("-")[1]
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            with open(index_path) as f:
+                entries = [line.split(",") for line in f.read().splitlines() if line]
+
+            with open(index_path[:-len(".index")] + ".blocks", "rb") as blocks:
+                for offset, length, session_min, session_max, time_min, time_max in entries:
+                    if session_id is not None and not int(session_min) <= session_id <= int(session_max):
+                        continue
+                    if start is not None and float(time_max) < start:
+                        continue
+                    if end is not None and float(time_min) >= end:
+                        continue
+
+                    blocks.seek(int(offset))
+                    with np.load(io.BytesIO(blocks.read(int(length))), allow_pickle=False) as block:
+                        columns = {column: block[column] for column in parts}
+
+                    mask = np.ones(len(columns["time"]), dtype=bool)
+                    if session_id is not None:
+                        mask &= columns["session"] == session_id
+                    if start is not None:
+                        mask &= columns["time"] >= start
+                    if end is not None:
+                        mask &= columns["time"] < end
+                    for column in parts:
+                        parts[column].append(columns[column][mask])
+
+        return {column: np.concatenate(values) if values else np.array([], dtype=dtype)
+                for (column, dtype), values in zip(TABLES[table], parts.values())}
@@ -6,6 +6,19 @@ import cv2
 import numpy as np
 import time
 import PoseModule5 as pm
+import Station
+import Profiler
+from WarmStart import warm_start
+from FormScoring import load_form_scorer
+from SessionStore import SessionStore
+
+FORM_REFERENCE_FILE = "form_references/squats.npz"
+FORM_JOINTS = {
+    "right_knee": (24, 26, 28),
+    "left_knee": (23, 25, 27),
+    "right_hip": (12, 24, 26),
+    "left_hip": (11, 23, 25),
+}
 
 
 class PoseEstimator:
@@ -13,12 +26,30 @@ class PoseEstimator:
     Class responsible for estimating the pose from an image and determining leg movement repetitions.
     """
 
-    def __init__(self):
-        """Initializes the pose detector and other necessary attributes."""
-        self.pose_detector = pm.BodyPoseAnalyzer()
+    # Average leg angles mapped to 0 % and 100 % of the progress bar
+    ANGLE_RANGE = (190, 240)
+
+    def __init__(self, form_scorer=None, pose_detector=None, session=None, reference_file=None):
+        """
+        Initializes the pose detector and other necessary attributes.
+
+        Args:
+        - form_scorer (RepFormScorer): Optional scorer comparing each completed rep against reference reps.
+        - pose_detector (BodyPoseAnalyzer): Optional detector shared with other estimators.
+        - session (Session): Optional session recording the frames and reps.
+        - reference_file (str): When given, every completed rep is added to the reference reps of the
+          form scorer and saved to this file.
+        """
+        self.pose_detector = pose_detector or pm.BodyPoseAnalyzer()
+        self.session = session
+        self.form_scorer = form_scorer
+        self.reference_file = reference_file
+        self.last_form_score = None
+        self.last_angle = None
         self.previous_time = 0
         self.direction = 0  # 0: standing position, 1: squat position
         self.repetitions = 0
+        self.rep_started = False  # Whether the frames fed to the form scorer belong to a rep
 
     def get_right_leg_angle(self, image):
         """
@@ -66,10 +97,78 @@ class PoseEstimator:
 
             # Here, we take the average of both angles to account for potential discrepancies
             avg_angle = (right_angle + left_angle) / 2
+            self.last_angle = avg_angle
+            repetitions, direction = self.repetitions, self.direction
             self.draw_workout_info(image, avg_angle)
+            if self.form_scorer:
+                self.track_rep_form(image, landmarks, avg_angle, direction)
+            if int(self.repetitions) > int(repetitions):
+                self.complete_rep()
+            if self.session:
+                self.session.record_frame(avg_angle, self.repetitions)
 
         return image
 
+    def track_rep_form(self, image, landmarks, angle, direction):
+        """
+        Feeds the current frame to the form scorer when it belongs to a rep.
+
+        A rep starts on the last frame in the start zone (0 % of the progress bar, the standing position),
+        so the pauses between reps are left out but the whole movement is scored. The start of a first
+        rep begun outside the start zone cannot be told from the lead-in, so it is scored from its first
+        direction change.
+
+        Args:
+        - image (np.ndarray): The image/frame being processed.
+        - landmarks (list): List of landmark positions.
+        - angle (float): Angle measured on this frame.
+        - direction (int): Movement direction before this frame.
+        """
+        if direction == 0 and self.direction == 0:
+            if np.interp(angle, self.ANGLE_RANGE, (0, 100)) == 0:
+                self.form_scorer.reset()
+                self.rep_started = True
+            elif not self.rep_started:
+                return
+        elif not self.rep_started:
+            self.form_scorer.reset()
+            self.rep_started = True
+        self.form_scorer.update(self.form_scorer.measure(self.pose_detector, image, landmarks))
+
+    def reset_movement(self):
+        """
+        Forgets the movement in progress, such as a rep left halfway when the athlete switched to
+        another exercise. Completed reps are kept.
+        """
+        self.direction = 0
+        self.repetitions = int(self.repetitions)
+        self.rep_started = False
+        if self.form_scorer:
+            self.form_scorer.reset()
+
+    def workout_data(self):
+        """
+        Returns the workout data shown to remote viewers.
+
+        Returns:
+        - dict: Exercise name, repetitions and angle of the latest frame.
+        """
+        return {"exercise": "squats", "repetitions": int(self.repetitions), "angle": self.last_angle}
+
+    def complete_rep(self):
+        """
+        Scores the rep that has just been completed and records it in the session. When recording
+        references, the rep is also saved as a reference rep.
+        """
+        if self.form_scorer:
+            self.last_form_score = self.form_scorer.finish_rep()
+            if self.reference_file and len(self.form_scorer.last_trajectory):
+                self.form_scorer.add_reference(self.form_scorer.last_trajectory)
+                self.form_scorer.save_references(self.reference_file)
+        if self.session:
+            score = self.last_form_score.score if self.last_form_score else None
+            self.session.record_rep(self.repetitions, score)
+
     def draw_workout_info(self, image, angle):
         """
         Draws the workout details, such as repetitions and leg angle, on the image.
@@ -78,8 +177,8 @@ class PoseEstimator:
         - image (np.ndarray): Image to draw on.
         - angle (float): Average angle of the legs.
         """
-        percentage = np.interp(angle, (190, 240), (0, 100))
-        bar_position = np.interp(angle, (190, 240), (650, 100))
+        percentage = np.interp(angle, self.ANGLE_RANGE, (0, 100))
+        bar_position = np.interp(angle, self.ANGLE_RANGE, (650, 100))
         bar_color = self.get_bar_color(percentage)
 
         cv2.rectangle(image, (1100, 100), (1175, 650), bar_color, -1)
@@ -87,6 +186,9 @@ class PoseEstimator:
         cv2.putText(image, f'{int(percentage)} %', (1080, 75), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 4)
         cv2.putText(image, f'Reps: {int(self.repetitions)}', (50, 700), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 5,
                     cv2.LINE_AA)
+        if self.last_form_score:
+            cv2.putText(image, f'Form: {int(self.last_form_score.score)} % ({self.last_form_score.worst_joint})',
+                        (50, 630), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3, cv2.LINE_AA)
 
     def get_bar_color(self, percentage):
         """
@@ -120,17 +222,37 @@ class PoseEstimator:
 
 def main():
     """Main function to initialize the webcam stream and process each frame."""
-    cap = cv2.VideoCapture(0)
-    estimator = PoseEstimator()
+    args = Station.parse_arguments("Squats station", form_scoring=True)
+
+    def setup():
+        return (SessionStore(), load_form_scorer(FORM_REFERENCE_FILE, FORM_JOINTS), Station.open_stream(args),
+                Station.open_recorder(args))
+
+    cap, pose_detector, resources = warm_start(setup, model_complexity=args.model_complexity,
+                                               recalibrate=args.recalibrate)
+    store, form_scorer, stream, recorder = resources
+    estimator = PoseEstimator(form_scorer, pose_detector, store.session("squats"),
+                              FORM_REFERENCE_FILE if args.record_reference else None)
 
-    while True:
-        success, frame = cap.read()
-        frame = cv2.resize(frame, (1280, 720))
-        processed_image = estimator.process_image(frame)
-        estimator.calculate_fps(processed_image)
+    Station.exit_on_stop_signals()
+    Profiler.install(args.profile_port, break_signal=False)
 
-        cv2.imshow("Workout Tracking", processed_image)
-        cv2.waitKey(1)
+    try:
+        while True:
+            success, frame = cap.read()
+            if not success:
+                break
+            frame = cv2.resize(frame, (1280, 720))
+            processed_image = estimator.process_image(frame)
+            estimator.calculate_fps(processed_image)
+            if stream:
+                stream.publish(processed_image, estimator.workout_data())
+            if not Station.present(processed_image, pose_detector, args, recorder):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        Station.close(cap, args, recorder)
 
 
 if __name__ == "__main__":
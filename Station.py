@@ -0,0 +1,126 @@
+import sys
+import signal
+import argparse
+import cv2
+import PoseModule5 as pm
+from LiveStream import LiveStreamServer
+from Recorder import VideoRecorder, LandmarkRecorder
+
+
+def parse_arguments(description, form_scoring=False):
+    """
+    Parses the command line options shared by the exercise stations.
+
+    Args:
+    - description (str): Description of the station shown in the help.
+    - form_scoring (bool): Whether the station scores the form of the reps against reference reps.
+
+    Returns:
+    - argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--model-complexity", choices=["auto"] + list(pm.MODEL_COMPLEXITY_TIERS),
+                        default=pm.MODEL_COMPLEXITY,
+                        help="pose model tier; auto picks the most accurate one running fast enough here")
+    parser.add_argument("--recalibrate", action="store_true",
+                        help="with --model-complexity auto, benchmark the tiers again instead of using the "
+                             "cached choice")
+    parser.add_argument("--stream-port", type=int, default=None,
+                        help="serve a live view of the station on this port")
+    parser.add_argument("--stream-host", default="127.0.0.1",
+                        help="address the live view listens on, e.g. 0.0.0.0 for the local network")
+    parser.add_argument("--headless", action="store_true",
+                        help="do not open a window; stop with Ctrl+C, SIGTERM or Ctrl+Break on Windows")
+    parser.add_argument("--record", metavar="PATH", default=None,
+                        help="record the annotated frames to this video file")
+    parser.add_argument("--landmarks-only", action="store_true",
+                        help="record a compact skeleton trace to the --record file instead of video")
+    parser.add_argument("--profile-port", type=int, default=None,
+                        help="accept profiling requests (Profiler.py <port> [seconds]) on this local port")
+    if form_scoring:
+        parser.add_argument("--record-reference", action="store_true",
+                            help="save every completed rep as a form reference rep; delete the files in "
+                                 "form_references/ to start over")
+    return parser.parse_args()
+
+
+def exit_on_stop_signals():
+    """
+    Exits through sys.exit on SIGTERM, and on Ctrl+Break on Windows, where the supervisor sends it
+    because terminating a process there skips all clean-up. The `finally` blocks and exit handlers
+    then finish the recording and write the buffered session rows.
+    """
+    for name in ("SIGTERM", "SIGBREAK"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), lambda signum, frame: sys.exit(0))
+
+
+def open_stream(args):
+    """
+    Starts the live view selected on the command line.
+
+    Args:
+    - args (argparse.Namespace): The parsed options.
+
+    Returns:
+    - LiveStreamServer: The started server, or None if there is no live view.
+    """
+    if not args.stream_port:
+        return None
+    return LiveStreamServer(args.stream_host, args.stream_port).start()
+
+
+def open_recorder(args, fps=30, size=(1280, 720)):
+    """
+    Starts the recorder selected on the command line.
+
+    Args:
+    - args (argparse.Namespace): The parsed options.
+    - fps (float): Frame rate of the recorded video.
+    - size (tuple): Size of the recorded frames.
+
+    Returns:
+    - BackgroundRecorder: The recorder, or None if nothing is recorded.
+    """
+    if not args.record:
+        return None
+    if args.landmarks_only:
+        return LandmarkRecorder(args.record)
+    return VideoRecorder(args.record, fps, size)
+
+
+def present(frame, pose_detector, args, recorder):
+    """
+    Records and displays a processed frame.
+
+    Args:
+    - frame (np.ndarray): The processed frame.
+    - pose_detector (BodyPoseAnalyzer): Detector holding the landmarks of the frame.
+    - args (argparse.Namespace): The parsed options.
+    - recorder (BackgroundRecorder): The recorder, or None.
+
+    Returns:
+    - bool: False once the user pressed "q" in the window.
+    """
+    if recorder:
+        recorder.record(frame, pose_detector.get_landmark_positions(frame, False))
+    if args.headless:
+        return True
+    cv2.imshow("Workout Tracking", frame)
+    return cv2.waitKey(1) & 0xFF != ord('q')
+
+
+def close(cap, args, recorder):
+    """
+    Releases the camera, finishes the recording and closes the window.
+
+    Args:
+    - cap (cv2.VideoCapture): The camera.
+    - args (argparse.Namespace): The parsed options.
+    - recorder (BackgroundRecorder): The recorder, or None.
+    """
+    cap.release()
+    if recorder:
+        recorder.close()
+    if not args.headless:
+        cv2.destroyAllWindows()
@@ -0,0 +1,368 @@
+import os
+import sys
+import time
+import signal
+import threading
+import subprocess
+import psutil
+
+# Number of logical CPUs reserved for the voice assistant; the exercise workers get the others
+ASSISTANT_CPU_COUNT = 1
+
+# Unix nice values, from -20 (highest priority) to 19. Both map to the above normal priority class on
+# Windows, which needs no administrator rights; elsewhere raising the priority needs them, and the
+# priority is left unchanged without them. The assistant comes first when the CPUs cannot be split.
+INFERENCE_NICE = -5
+ASSISTANT_NICE = -10
+
+
+def split_cpus(assistant_count=ASSISTANT_CPU_COUNT):
+    """
+    Splits the CPUs available to this process between the voice assistant and the exercise workers.
+
+    Args:
+    - assistant_count (int): Number of CPUs reserved for the voice assistant.
+
+    Returns:
+    - tuple: CPUs of the voice assistant, CPUs of the exercise workers. Both get all the CPUs
+      when there are too few to split.
+    """
+    process = psutil.Process()
+    if hasattr(process, "cpu_affinity"):
+        cpus = process.cpu_affinity()
+    else:
+        cpus = list(range(psutil.cpu_count() or 1))
+    if len(cpus) <= assistant_count:
+        return cpus, cpus
+    return cpus[-assistant_count:], cpus[:-assistant_count]
+
+
+def windows_priority(nice):
+    """Returns the Windows priority class closest to a Unix nice value."""
+    if nice <= -15:
+        return psutil.HIGH_PRIORITY_CLASS
+    if nice < 0:
+        return psutil.ABOVE_NORMAL_PRIORITY_CLASS
+    if nice == 0:
+        return psutil.NORMAL_PRIORITY_CLASS
+    if nice < 15:
+        return psutil.BELOW_NORMAL_PRIORITY_CLASS
+    return psutil.IDLE_PRIORITY_CLASS
+
+
+def apply_resources(process, cpus=None, nice=None):
+    """
+    Pins a process to a set of CPUs and sets its scheduling priority, where the platform allows it.
+
+    Args:
+    - process (psutil.Process): The process.
+    - cpus (list): CPUs the process may run on, or None to leave the affinity unchanged.
+    - nice (int): Unix nice value, or None to leave the priority unchanged.
+    """
+    # macOS does not support CPU affinity
+    if cpus and hasattr(process, "cpu_affinity"):
+        try:
+            process.cpu_affinity(cpus)
+        except psutil.AccessDenied:
+            print(f"Not allowed to set the CPUs of process {process.pid}")
+    if nice is not None:
+        try:
+            process.nice(windows_priority(nice) if os.name == "nt" else nice)
+        except psutil.AccessDenied:
+            print(f"Not allowed to set the priority of process {process.pid} to {nice}")
+
+
+class Worker:
+    """
+    One supervised process, restarted with the same command, CPUs and priority.
+    """
+
+    def __init__(self, name, command, cpus=None, nice=None):
+        """
+        Args:
+        - name (str): Name of the worker, e.g. "bicep_curls".
+        - command (list): Command line starting the worker.
+        - cpus (list): CPUs the worker may run on, or None for all of them.
+        - nice (int): Unix nice value of the worker, or None to inherit it.
+        """
+        self.name = name
+        self.command = command
+        self.cpus = cpus
+        self.nice = nice
+        self.process = None
+        self.restarts = 0
+        # Serializes stopping and restarting, which run outside the supervisor lock
+        self.lock = threading.Lock()
+        self.stopped = False
+        self.restarting = False
+
+    def start(self):
+        """Starts the worker process."""
+        if os.name == "nt":
+            # Its own process group lets `stop` send Ctrl+Break to the worker only
+            self.process = psutil.Popen(self.command, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+        else:
+            self.process = psutil.Popen(self.command)
+        apply_resources(self.process, self.cpus, self.nice)
+        # The first call only starts the measurement interval
+        self.process.cpu_percent(None)
+        self.cpu_time = 0.0
+        self.last_progress = time.time()
+
+    def stop(self, timeout=10.0):
+        """Stops the worker for good, including a restart in progress."""
+        with self.lock:
+            self.stopped = True
+            self.shutdown(timeout)
+
+    def shutdown(self, timeout=10.0):
+        """
+        Asks the worker process to exit, so it finishes its recording and writes its buffered session
+        rows, and kills it if it is still running after `timeout` seconds. The request is SIGTERM, or
+        Ctrl+Break on Windows, where `terminate` would end the process without any clean-up.
+        """
+        if self.process.poll() is not None:
+            return
+        try:
+            if os.name == "nt":
+                self.process.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                self.process.terminate()
+            self.process.wait(timeout)
+        except psutil.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        except psutil.NoSuchProcess:
+            pass
+
+    def restart(self):
+        """Stops the worker process and starts it again, unless the worker has been stopped meanwhile."""
+        with self.lock:
+            if self.stopped:
+                return
+            self.restarting = True
+            try:
+                self.shutdown()
+                self.restarts += 1
+                self.start()
+            finally:
+                self.restarting = False
+
+    def running(self):
+        """Returns True while the worker process has not exited."""
+        return self.process is not None and self.process.poll() is None
+
+    def active(self):
+        """Returns True while the worker holds the camera: running, restarting, or crashed and not yet restarted."""
+        return self.restarting or (self.process is not None and self.process.poll() != 0)
+
+    def check(self, stall_timeout, max_rss_mb):
+        """
+        Looks for a crashed, stuck or runaway worker.
+
+        A frame loop always uses some CPU, so a worker whose CPU time has not moved for
+        `stall_timeout` seconds is considered stuck.
+
+        Args:
+        - stall_timeout (float): Time without CPU progress after which the worker is stuck, in seconds.
+        - max_rss_mb (float): Resident memory above which the worker is runaway, in MB, or None.
+
+        Returns:
+        - str: "finished" if the worker exited normally, a description of the problem, or None if
+          the worker is healthy.
+        """
+        exit_code = self.process.poll()
+        if exit_code == 0:
+            return "finished"
+        if exit_code is not None:
+            return f"crashed with exit code {exit_code}"
+
+        try:
+            cpu_times = self.process.cpu_times()
+            rss_mb = self.process.memory_info().rss / 2 ** 20
+        except psutil.NoSuchProcess:
+            return None
+
+        now = time.time()
+        if cpu_times.user + cpu_times.system > self.cpu_time:
+            self.cpu_time = cpu_times.user + cpu_times.system
+            self.last_progress = now
+        elif now - self.last_progress > stall_timeout:
+            return f"stuck for {now - self.last_progress:.0f} s"
+
+        if max_rss_mb and rss_mb > max_rss_mb:
+            return f"using {rss_mb:.0f} MB of memory"
+        return None
+
+    def stats(self):
+        """
+        Returns:
+        - dict: Name, PID, CPU usage since the previous call (100 % per core), resident memory
+          in MB and restart count of the worker.
+        """
+        try:
+            cpu_percent = self.process.cpu_percent(None)
+            rss_mb = self.process.memory_info().rss / 2 ** 20
+        except psutil.NoSuchProcess:
+            cpu_percent, rss_mb = 0.0, 0.0
+        return {"worker": self.name, "pid": self.process.pid, "cpu_percent": cpu_percent, "rss_mb": rss_mb,
+                "restarts": self.restarts}
+
+
+class Supervisor:
+    """
+    Launches, health-checks and restarts the exercise workers of the voice assistant.
+
+    The exercise workers run pose inference on their own CPUs and the assistant is pinned to
+    the remaining ones, so under load the frame loop keeps its frame rate and speech
+    recognition stays responsive. A background thread checks the workers every
+    `check_interval` seconds: a worker that crashed, got stuck or uses more than `max_rss_mb`
+    is restarted up to `max_restarts` times, and the CPU usage and memory of every worker is
+    recorded in the session, if one is given.
+    """
+
+    def __init__(self, assistant_cpus=None, inference_cpus=None, assistant_nice=ASSISTANT_NICE,
+                 inference_nice=INFERENCE_NICE, check_interval=2.0, stall_timeout=15.0, max_rss_mb=2048,
+                 max_restarts=3, session=None):
+        """
+        Initializes the supervisor.
+
+        Args:
+        - assistant_cpus (list): CPUs of the voice assistant. Defaults to the split of `split_cpus`.
+        - inference_cpus (list): CPUs of the exercise workers. Defaults to the split of `split_cpus`.
+        - assistant_nice (int): Unix nice value of the voice assistant, or None to leave it unchanged.
+        - inference_nice (int): Unix nice value of the exercise workers, or None to inherit it.
+        - check_interval (float): Time between two health checks, in seconds.
+        - stall_timeout (float): Time without CPU progress after which a worker is stuck, in seconds.
+        - max_rss_mb (float): Resident memory above which a worker is restarted, in MB, or None.
+        - max_restarts (int): Number of restarts after which a failing worker is given up.
+        - session (Session): Session recording the worker stats, or None.
+        """
+        default_assistant_cpus, default_inference_cpus = split_cpus()
+        self.assistant_cpus = assistant_cpus or default_assistant_cpus
+        self.inference_cpus = inference_cpus or default_inference_cpus
+        self.assistant_nice = assistant_nice
+        self.inference_nice = inference_nice
+        self.check_interval = check_interval
+        self.stall_timeout = stall_timeout
+        self.max_rss_mb = max_rss_mb
+        self.max_restarts = max_restarts
+        self.session = session
+
+        self.workers = {}
+        self.lock = threading.Lock()
+        self.monitor = None
+
+    def pin_assistant(self):
+        """Pins the calling process, the voice assistant, to its CPUs and priority."""
+        apply_resources(psutil.Process(), self.assistant_cpus, self.assistant_nice)
+
+    def launch(self, name, command):
+        """
+        Starts a worker, unless one with the same name is already active.
+
+        Args:
+        - name (str): Name of the worker.
+        - command (list): Command line starting the worker.
+
+        Returns:
+        - bool: False if the worker was already active.
+        """
+        with self.lock:
+            if name in self.workers and self.workers[name].active():
+                return False
+            worker = Worker(name, command, self.inference_cpus, self.inference_nice)
+            worker.start()
+            self.workers[name] = worker
+
+            if self.monitor is None:
+                self.monitor = threading.Thread(target=self.monitor_loop, name="supervisor", daemon=True)
+                self.monitor.start()
+        return True
+
+    def stop(self, name=None):
+        """
+        Stops a worker, or all of them.
+
+        Args:
+        - name (str): Name of the worker to stop. All workers are stopped when omitted.
+
+        Returns:
+        - bool: False if no matching worker was active.
+        """
+        with self.lock:
+            names = [name] if name else list(self.workers)
+            workers = [self.workers.pop(n) for n in names if n in self.workers]
+        stopped = False
+        for worker in workers:
+            if worker.active():
+                stopped = True
+            worker.stop()
+        return stopped
+
+    def running(self, name=None):
+        """
+        Returns True if the named worker, or any worker when no name is given, is active. A worker
+        that crashed still counts until the monitor restarts it or gives up on it, so that no other
+        worker takes the camera in between.
+        """
+        with self.lock:
+            return any(worker.active() for n, worker in self.workers.items() if name in (None, n))
+
+    def report(self):
+        """
+        Returns:
+        - list: Stats of every worker, as returned by `Worker.stats`.
+        """
+        with self.lock:
+            return [worker.stats() for worker in self.workers.values()]
+
+    def monitor_loop(self):
+        """Checks the workers, restarts the failing ones and records their stats."""
+        while True:
+            time.sleep(self.check_interval)
+            failed, given_up = [], []
+            with self.lock:
+                for name, worker in list(self.workers.items()):
+                    problem = worker.check(self.stall_timeout, self.max_rss_mb)
+                    if problem == "finished":
+                        del self.workers[name]
+                    elif problem and worker.restarts >= self.max_restarts:
+                        print(f"Worker {name} {problem}, giving up after {worker.restarts} restarts")
+                        given_up.append((name, worker))
+                    elif problem:
+                        print(f"Worker {name} {problem}, restarting it")
+                        failed.append(worker)
+                    elif self.session:
+                        stats = worker.stats()
+                        self.session.record_worker(name, stats["pid"], stats["cpu_percent"], stats["rss_mb"],
+                                                   stats["restarts"])
+
+            # Stopping a worker can take seconds, so it is done without holding the lock the assistant
+            # needs. A worker being stopped stays listed and keeps holding the camera until it is gone.
+            for worker in failed:
+                worker.restart()
+            for name, worker in given_up:
+                worker.stop()
+                with self.lock:
+                    if self.workers.get(name) is worker:
+                        del self.workers[name]
+
+
+def main():
+    """Runs one supervised exercise station and prints its stats: Supervisor.py <script> [arguments]"""
+    supervisor = Supervisor()
+    supervisor.pin_assistant()
+    supervisor.launch(os.path.splitext(os.path.basename(sys.argv[1]))[0], [sys.executable] + sys.argv[1:])
+    try:
+        while supervisor.running():
+            time.sleep(supervisor.check_interval)
+            for stats in supervisor.report():
+                print(f"{stats['worker']} (PID {stats['pid']}): CPU {stats['cpu_percent']:.0f} %, "
+                      f"memory {stats['rss_mb']:.0f} MB, {stats['restarts']} restarts")
+    except KeyboardInterrupt:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import sys
+import numpy as np
+import speech_recognition as sr
+
+
+def google_backend(recognizer, audio):
+    """Recognizes the audio with the Google Web Speech API."""
+    return recognizer.recognize_google(audio, language='en-in')
+
+
+def sphinx_backend(recognizer, audio):
+    """Recognizes the audio on-device with CMU Sphinx, as a local stand-in for the cloud recognizer."""
+    return recognizer.recognize_sphinx(audio)
+
+
+def sphinx_spotter(recognizer, audio, wake_word, sensitivity=0.8):
+    """
+    Looks for the wake word on-device with CMU Sphinx keyword spotting.
+
+    Args:
+    - recognizer (sr.Recognizer): Recognizer used for the keyword search.
+    - audio (sr.AudioData): The captured utterance.
+    - wake_word (str): The keyword to look for.
+    - sensitivity (float): Keyword sensitivity from 0 (strict) to 1 (permissive).
+
+    Returns:
+    - float: Time in seconds at which the wake word ends, or None if it was not spoken.
+    """
+    decoder = recognizer.recognize_sphinx(audio, keyword_entries=[(wake_word, sensitivity)], show_all=True)
+    if decoder.hyp() is None:
+        return None
+    for segment in decoder.seg():
+        # Alternate pronunciations are reported as e.g. "fitness(2)"
+        if segment.word.split("(")[0].strip().lower() == wake_word:
+            end_frame = getattr(segment, "end_frame", None)
+            if end_frame is None:
+                end_frame = segment.start + segment.duration - 1
+            # Sphinx uses 10 ms frames
+            return (end_frame + 1) / 100
+    return None
+
+
+class VoiceActivityDetector:
+    """
+    Energy based voice activity detection on 16-bit PCM audio.
+    """
+
+    def __init__(self, energy_threshold=300, frame_ms=30, min_speech_ms=150):
+        """
+        Args:
+        - energy_threshold (float): RMS energy above which a frame counts as speech, as in `sr.Recognizer`.
+        - frame_ms (int): Length of an analysis frame in milliseconds.
+        - min_speech_ms (int): Amount of speech required for an utterance to count as voiced.
+        """
+        self.energy_threshold = energy_threshold
+        self.frame_ms = frame_ms
+        self.min_speech_ms = min_speech_ms
+
+    def speech_duration(self, audio):
+        """
+        Measures how much of the audio contains speech.
+
+        Args:
+        - audio (sr.AudioData): The captured utterance.
+
+        Returns:
+        - int: Speech duration in milliseconds.
+        """
+        samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype=np.int16)
+        frame_length = int(audio.sample_rate * self.frame_ms / 1000)
+        frame_count = len(samples) // frame_length
+        if frame_count == 0:
+            return 0
+        frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length).astype(np.float32)
+        rms = np.sqrt((frames ** 2).mean(axis=1))
+        return int((rms > self.energy_threshold).sum()) * self.frame_ms
+
+    def is_speech(self, audio):
+        """Returns True if the audio contains enough speech to be a command."""
+        return self.speech_duration(audio) >= self.min_speech_ms
+
+
+class WakeWordGate:
+    """
+    Runs voice activity detection and on-device wake word spotting in front of the speech
+    recognizer, so that only audio spoken after the wake word reaches the recognizer backend.
+    """
+
+    def __init__(self, backend=google_backend, wake_word="fitness", spotter=sphinx_spotter,
+                 vad=None):
+        """
+        Initializes the gate.
+
+        Args:
+        - backend (callable): Function (recognizer, audio) -> text recognizing the command.
+        - wake_word (str): The keyword every command starts with.
+        - spotter (callable): Function (recognizer, audio, wake_word) -> end time of the wake word in seconds, or None.
+        - vad (VoiceActivityDetector): Voice activity detector. A default detector is used when omitted.
+        """
+        self.backend = backend
+        self.wake_word = wake_word.lower()
+        self.spotter = spotter
+        self.vad = vad or VoiceActivityDetector()
+        self.spotting = True  # False once the spotter failed to run, e.g. without PocketSphinx
+        self.stats = {"utterances": 0, "voiced": 0, "wake_words": 0, "recognitions": 0}
+
+    def recognize(self, recognizer, audio):
+        """
+        Recognizes a command if it is introduced by the wake word.
+
+        Args:
+        - recognizer (sr.Recognizer): Recognizer used for spotting and recognition.
+        - audio (sr.AudioData): The captured utterance.
+
+        Returns:
+        - str: The command prefixed with the wake word, or None if the audio was gated out.
+        """
+        self.stats["utterances"] += 1
+        if not self.vad.is_speech(audio):
+            return None
+        self.stats["voiced"] += 1
+        if not self.spotting:
+            return self.recognize_unspotted(recognizer, audio)
+
+        try:
+            wake_word_end = self.spotter(recognizer, audio, self.wake_word)
+        except sr.UnknownValueError:
+            wake_word_end = None
+        except sr.RequestError as e:
+            print(f"Wake word spotting unavailable ({e}), every voiced utterance is sent to the recognizer")
+            self.spotting = False
+            return self.recognize_unspotted(recognizer, audio)
+        if wake_word_end is None:
+            return None
+        self.stats["wake_words"] += 1
+
+        command = self.trim(audio, wake_word_end)
+        if not self.vad.is_speech(command):
+            return self.wake_word
+
+        self.stats["recognitions"] += 1
+        text = self.backend(recognizer, command).lower().strip()
+        # The recognizer may still hear the tail of the wake word
+        if text.startswith(self.wake_word):
+            text = text[len(self.wake_word):].strip()
+        return f"{self.wake_word} {text}"
+
+    def recognize_unspotted(self, recognizer, audio):
+        """
+        Recognizes the whole utterance and looks for the wake word in the text, as before the gate.
+
+        Args:
+        - recognizer (sr.Recognizer): Recognizer used for recognition.
+        - audio (sr.AudioData): The captured utterance.
+
+        Returns:
+        - str: The command prefixed with the wake word, or None if it does not start with it.
+        """
+        self.stats["recognitions"] += 1
+        text = self.backend(recognizer, audio).lower().strip()
+        if not text.startswith(self.wake_word):
+            return None
+        self.stats["wake_words"] += 1
+        return text
+
+    def trim(self, audio, start):
+        """
+        Returns the part of the audio following the given time.
+
+        Args:
+        - audio (sr.AudioData): The captured utterance.
+        - start (float): Start time in seconds.
+
+        Returns:
+        - sr.AudioData: The remaining audio.
+        """
+        offset = int(start * audio.sample_rate) * audio.sample_width
+        return sr.AudioData(audio.frame_data[offset:], audio.sample_rate, audio.sample_width)
+
+    def recognize_wav(self, path, recognizer=None):
+        """
+        Runs the gate on a recorded WAV file, for offline testing.
+
+        Args:
+        - path (str): Path to the WAV file.
+        - recognizer (sr.Recognizer): Recognizer to use. A new one is created when omitted.
+
+        Returns:
+        - str: The command prefixed with the wake word, or None if the audio was gated out.
+        """
+        recognizer = recognizer or sr.Recognizer()
+        with sr.AudioFile(path) as source:
+            audio = recognizer.record(source)
+        return self.recognize(recognizer, audio)
+
+
+def main():
+    """Runs the gate with the local recognizer over the WAV files given on the command line."""
+    gate = WakeWordGate(backend=sphinx_backend)
+    for path in sys.argv[1:]:
+        print(f"{path}: {gate.recognize_wav(path)}")
+    print(gate.stats)
+
+
+if __name__ == "__main__":
+    main()
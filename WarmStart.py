@@ -0,0 +1,96 @@
+import time
+import psutil
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import PoseModule5 as pm
+
+
+class PrimedCapture:
+    """
+    Camera wrapper that first returns the frame read during the warm start, then reads new ones.
+
+    The second `read` call means the first frame has been fully processed, so the time to first
+    frame is reported then.
+    """
+
+    def __init__(self, cap, first_frame, timings):
+        """
+        Args:
+        - cap (cv2.VideoCapture): The opened camera.
+        - first_frame (np.ndarray): The frame read during the warm start, or None.
+        - timings (dict): Duration of each warm start step, in seconds.
+        """
+        self.cap = cap
+        self.first_frame = first_frame
+        self.timings = timings
+        self.reads = 0
+
+    def read(self):
+        """Returns the next frame, like `cv2.VideoCapture.read`."""
+        self.reads += 1
+        if self.reads == 2:
+            report_time_to_first_frame(self.timings)
+        if self.first_frame is not None:
+            frame, self.first_frame = self.first_frame, None
+            return True, frame
+        return self.cap.read()
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+
+def report_time_to_first_frame(timings):
+    """Prints the time since the process was launched and the duration of each warm start step."""
+    elapsed = time.time() - psutil.Process().create_time()
+    steps = ", ".join(f"{step} {duration:.2f} s" for step, duration in timings.items())
+    print(f"Time to first frame: {elapsed:.2f} s ({steps})")
+
+
+def warm_start(setup, camera_index=0, size=(1280, 720), model_complexity=pm.MODEL_COMPLEXITY, recalibrate=False):
+    """
+    Opens the camera, loads and warms up the pose model, and sets up the overlay resources
+    concurrently, so the first frame is ready as soon as the slowest of them finishes.
+
+    Args:
+    - setup (callable): Function creating the overlay resources (session store, form scorer, ...).
+    - camera_index (int): Index of the camera to open.
+    - size (tuple): Size of the frames processed by the frame loop.
+    - model_complexity (str): A model tier name, or "auto".
+    - recalibrate (bool): Calibrate the model tier again in "auto" mode, even if a tier is cached.
+
+    Returns:
+    - tuple: The camera, the warmed up `BodyPoseAnalyzer` and the result of `setup`.
+    """
+    timings = {}
+
+    def timed(step, function, *args):
+        started = time.perf_counter()
+        result = function(*args)
+        timings[step] = time.perf_counter() - started
+        return result
+
+    def open_camera():
+        cap = cv2.VideoCapture(camera_index)
+        success, frame = cap.read()
+        return cap, frame if success else None
+
+    def load_model(camera):
+        tier = pm.cached_model_complexity(model_complexity, recalibrate=recalibrate)
+        if tier is None:
+            # Calibrating needs frames of the athlete, so it has to wait for the camera
+            tier = pm.startup_model_complexity(camera.result()[0], model_complexity, size=size,
+                                               recalibrate=recalibrate)
+        pose_detector = pm.BodyPoseAnalyzer(model_complexity=tier)
+        pose_detector.get_pose(np.zeros((size[1], size[0], 3), dtype=np.uint8), False)
+        return pose_detector
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        camera = executor.submit(timed, "camera", open_camera)
+        model = executor.submit(timed, "model", load_model, camera)
+        resources = executor.submit(timed, "overlay", setup)
+        cap, first_frame = camera.result()
+        pose_detector = model.result()
+        resources = resources.result()
+
+    return PrimedCapture(cap, first_frame, timings), pose_detector, resources
@@ -0,0 +1,88 @@
+import pytest
+import numpy as np
+from FormScoring import RepFormScorer
+
+JOINTS = {"right_elbow": (12, 14, 16), "right_shoulder": (14, 12, 24)}
+
+
+def curl(amplitude, frames):
+    """Elbow and shoulder angles of one curl starting and ending with the arm extended."""
+    phase = np.sin(np.linspace(0, np.pi, frames))
+    return np.stack((160 - amplitude * phase, 20 + amplitude / 6 * phase), axis=1)
+
+
+def score_rep(scorer, rep):
+    for angles in rep:
+        scorer.update(angles)
+    return scorer.finish_rep()
+
+
+def test_matching_rep_scores_full_marks():
+    scorer = RepFormScorer(JOINTS, [curl(60, 40)])
+    assert score_rep(scorer, curl(60, 40)).score > 99
+
+
+def test_partial_range_reps_score_lower_instead_of_none():
+    full = score_rep(RepFormScorer(JOINTS, [curl(60, 40)]), curl(60, 40)).score
+    for amplitude, frames in [(50, 40), (45, 20), (30, 30), (30, 10)]:
+        result = score_rep(RepFormScorer(JOINTS, [curl(60, 40)]), curl(amplitude, frames))
+        assert result is not None, (amplitude, frames)
+        assert result.score < full
+        assert result.worst_joint == "right_elbow"
+
+    scores = [score_rep(RepFormScorer(JOINTS, [curl(60, 40)]), curl(amplitude, 40)).score
+              for amplitude in (50, 40, 30, 20, 0)]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_band_follows_the_tempo_of_the_previous_rep():
+    for frames in (20, 25, 80, 120):
+        scorer = RepFormScorer(JOINTS, [curl(60, 40)])
+        first = score_rep(scorer, curl(60, frames))
+        second = score_rep(scorer, curl(60, frames))
+        assert first.score > 85, frames
+        assert second.score >= first.score
+
+
+class ScriptedPose:
+    """Pose detector measuring the scripted angle on every joint instead of analysing the frames."""
+
+    def __init__(self):
+        self.angle = 180.0
+
+    def get_pose(self, img, draw=True):
+        return img
+
+    def get_landmark_positions(self, img, draw=True):
+        return [[index, 0, 0] for index in range(33)]
+
+    def calculate_angle(self, img, point1, point2, point3, landmarks, draw=True):
+        return self.angle
+
+
+def test_estimator_scores_the_whole_squat():
+    pytest.importorskip("cv2")
+    pytest.importorskip("mediapipe")
+    import Squats_Exercise
+
+    pose = ScriptedPose()
+    scorer = RepFormScorer(Squats_Exercise.FORM_JOINTS)
+    estimator = Squats_Exercise.PoseEstimator(scorer, pose)
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+    squat = 180 + 70 * np.sin(np.linspace(0, np.pi, 40))
+
+    trajectories = []
+    for pause in (15, 3, 30):
+        for pose.angle in np.concatenate((np.full(pause, 180.0), squat)):
+            estimator.process_image(image)
+        trajectories.append(scorer.last_trajectory)
+        if not scorer.references:
+            scorer.add_reference(scorer.last_trajectory)
+
+    assert int(estimator.repetitions) == 3
+    for trajectory in trajectories:
+        # From the last standing frame through the descent and back up, whatever the pause before it
+        assert trajectory[0, 0] <= Squats_Exercise.PoseEstimator.ANGLE_RANGE[0]
+        assert trajectory[:, 0].max() == pytest.approx(squat.max())
+        assert len(trajectory) == len(trajectories[0])
+    assert estimator.last_form_score.score > 99
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("mediapipe")
+from OfflineScoring import OfflineScorer
+
+
+def squat_signal(seed, frames=900):
+    """Average leg angle of a session of squats with uneven depth, tempo and pose noise."""
+    rng = np.random.default_rng(seed)
+    period = rng.uniform(25, 60)
+    depth = np.interp(np.arange(frames), np.arange(0, frames + 25, 25), rng.uniform(50, 75, frames // 25 + 1))
+    phase = 2 * np.pi * np.arange(frames) / period + rng.uniform(0, 2 * np.pi)
+    return 180 + depth * (1 - np.cos(phase)) / 2 + rng.normal(0, 2, frames)
+
+
+def test_merged_signal_counts_like_the_dense_signal():
+    scorer = OfflineScorer("squats")
+    for seed in range(20):
+        signal = squat_signal(seed)
+        # Recordings cut anywhere in a rep, so peaks also fall next to the first and last frames
+        for cut in range(0, 40, 3):
+            dense = dict(enumerate(signal[cut:len(signal) - cut]))
+            samples = {index: dense[index] for index in range(0, len(dense), scorer.stride)}
+            for start, end in scorer.candidate_windows(samples, len(dense)):
+                samples.update((index, dense[index]) for index in range(start, end + 1))
+            assert scorer.count(samples) == scorer.count(dense), (seed, cut)